@@ -1,49 +1,69 @@
 #!/bin/env python3
+import os
 import shutil
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
 from subprocess import run
 
+
+# Opt-in profiling: if this is set, the durations of the steps are recorded to that file.
+# It is only set when the template is rendered by scverse_template_scripts, which then runs the hooks with its Python.
+if os.environ.get("COOKIECUTTER_SCVERSE_HOOK_TIMINGS"):
+    from scverse_template_scripts.render import hook_step
+
+    timed = partial(hook_step, "post_gen_project")
+else:
+
+    def timed(step: str):
+        return nullcontext()
+
+
 {% if not cookiecutter._render_devdocs %}
 # Post processing
-Path("docs/template_usage.md").unlink()
+with timed("remove devdocs"):
+    Path("docs/template_usage.md").unlink()
 {% endif %}
 
 # Skip directories marked for skipping
-def skipped_dirs():
-    for toplevel in Path().iterdir():
-        if toplevel.name == ".git":
-            continue
-        if toplevel.name == "DELETE-ME":
-            yield toplevel
-        else:
-            yield from toplevel.rglob("DELETE-ME")
+def prune_skipped_dirs():
+    """Remove all `DELETE-ME` directories in a single walk, which doesn’t descend into removed ones."""
+    for root, dirs, files in os.walk("."):
+        assert "DELETE-ME" not in files, Path(root, "DELETE-ME")
+        for d in [d for d in dirs if d == "DELETE-ME"]:
+            shutil.rmtree(Path(root, d))
+        dirs[:] = [d for d in dirs if d not in {".git", "DELETE-ME"}]
 
 
-for path in skipped_dirs():
-    assert path.is_dir(), path
-    shutil.rmtree(path)
+with timed("prune"):
+    prune_skipped_dirs()
 
+# The template sync only copies the files into an existing repo, so it skips creating the repo
+{% if not cookiecutter._sync_render %}
 # Make initial commit
 # This will make template updates smoother, because like this we can rely on the first commit in the repo
 # being just the template without additional changes.
 print("Making initial commit")
-run(["git", "add", "-A"], check=True)
+with timed("git commit"):
+    run(["git", "add", "-A"], check=True)
 
-# Make initial commit
-msg = "Initialize project from cookiecutter-scverse"
-run(args=["git", "commit", "--no-verify", "--no-gpg-sign", "-m", msg], check=True)
+    # Make initial commit
+    msg = "Initialize project from cookiecutter-scverse"
+    run(args=["git", "commit", "--no-verify", "--no-gpg-sign", "-m", msg], check=True)
 
 # Install the git hook (prefer prek, fall back to pre-commit)
 exc = None
-for cmd in (["prek", "install"], ["hatch", "run", "hatch-check-code:prek", "install"], ["pre-commit", "install"]):
-    try:
-        run(cmd, check=True)
-        break
-    except FileNotFoundError as e:
-        if exc is None:
-            exc = e
-else:
-    raise exc
+with timed("install git hooks"):
+    for cmd in (["prek", "install"], ["hatch", "run", "hatch-check-code:prek", "install"], ["pre-commit", "install"]):
+        try:
+            run(cmd, check=True)
+            break
+        except FileNotFoundError as e:
+            if exc is None:
+                exc = e
+    else:
+        raise exc
+{% endif %}
 
 # The following output was generated using rich
 # The formatted output is included here directly, because I don't want
@@ -0,0 +1,225 @@
+"""Benchmark of generating projects from the template.
+
+Renders the template for every combination of the options in `cookiecutter.json`: license, IDE integration,
+issue categorization, and a package name that does or doesn’t match the project name.
+Every combination is rendered with `cookiecutter`, like users and `test_build` do, and for comparison
+with the in-process `TemplateRenderer` of the template sync. Records the wall time of every rendering,
+the steps of the hooks, for `TemplateRenderer` also how the rest splits between planning,
+copying (`_copy_without_render` and binary files), and rendering files with Jinja,
+as well as the number and size of the generated files.
+
+The results can be stored as JSON and compared to those of a baseline, e.g. the main branch.
+Run from the `scripts` directory, e.g.::
+
+    git switch main && python benchmarks/bench_generate.py --output baseline.json
+    git switch my-branch && python benchmarks/bench_generate.py --baseline baseline.json
+"""
+
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import TYPE_CHECKING
+
+from cookiecutter.main import cookiecutter
+from cyclopts import App
+from rich.console import Console
+from rich.table import Table
+
+from scverse_template_scripts.render import HOOK_TIMINGS_VAR, TemplateRenderer, hook_timings
+from scverse_template_scripts.trace import tracer
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator
+    from typing import Any
+
+    type Render = Callable[[Path, dict[str, Any]], Path]
+
+TEMPLATE = Path(__file__).parents[2]
+
+app = App()
+
+
+def option_matrix() -> Generator[tuple[str, dict[str, Any]]]:
+    """All combinations of the template’s options, with an ID for each."""
+    options = json.loads((TEMPLATE / "cookiecutter.json").read_text())
+    for license_, ide, issues, match in itertools.product(
+        options["license"], [True, False], options["issue_categorization"], [True, False]
+    ):
+        context = {
+            "project_name": "bench-project",
+            **({} if match else {"package_name": "bench_pkg"}),
+            "license": license_,
+            "ide_integration": ide,
+            "issue_categorization": issues,
+        }
+        case_id = "|".join([license_, f"ide={ide}", issues, "package=" + ("matching" if match else "different")])
+        yield case_id, context
+
+
+def render_cookiecutter(output_dir: Path, context: dict[str, Any]) -> Path:
+    """Render the template with `cookiecutter`, tracing the steps of the hooks."""
+    with hook_timings() as env, _discard_stdout():
+        os.environ[HOOK_TIMINGS_VAR] = env[HOOK_TIMINGS_VAR]
+        try:
+            return Path(cookiecutter(str(TEMPLATE), output_dir=str(output_dir), no_input=True, extra_context=context))
+        finally:
+            del os.environ[HOOK_TIMINGS_VAR]
+
+
+@contextlib.contextmanager
+def _discard_stdout() -> Generator[None]:
+    """Discard the output of the hooks, which cookiecutter doesn’t capture, on the file descriptor level."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with Path(os.devnull).open("w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def run_case(render: Render, context: dict[str, Any]) -> dict[str, Any]:
+    """Render the template once, returning the wall time, the time per phase, and the generated files."""
+    n_spans = len(tracer.spans)
+    with TemporaryDirectory() as td:
+        start = time.perf_counter()
+        project_dir = render(Path(td), context)
+        wall_time = time.perf_counter() - start
+        files = [f for f in project_dir.rglob("*") if f.is_file() and ".git" not in f.relative_to(project_dir).parts]
+        n_bytes = sum(f.stat().st_size for f in files)
+    phases: dict[str, float] = defaultdict(float)
+    for s in tracer.spans[n_spans:]:
+        phases[s.name if s.category == "render" else f"{s.args['hook']}: {s.name}"] += s.duration
+    return {"wall_time": wall_time, "phases": dict(phases), "files": len(files), "bytes": n_bytes}
+
+
+def summarize(cases: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Median wall time, and total time per phase over all cases."""
+    phases: dict[str, float] = defaultdict(float)
+    for case in cases.values():
+        for name, t in case["phases"].items():
+            phases[name] += t
+    return {
+        "median_wall_time": statistics.median(c["wall_time"] for c in cases.values()),
+        "total_wall_time": sum(c["wall_time"] for c in cases.values()),
+        "phases": dict(phases),
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], console: Console) -> float:
+    """
+    Print a comparison of the summaries and differing file counts of every engine.
+
+    Returns the ratio of the median times with `cookiecutter`, which is what users run.
+    """
+    for engine, current in results["engines"].items():
+        if (before := baseline["engines"].get(engine)) is not None:
+            _compare_engine(engine, current, before, console)
+    primary = results["engines"]["cookiecutter"]["summary"]
+    return primary["median_wall_time"] / baseline["engines"]["cookiecutter"]["summary"]["median_wall_time"]
+
+
+def _compare_engine(engine: str, results: dict[str, Any], baseline: dict[str, Any], console: Console) -> None:
+    table = Table("Metric", "Baseline", "Current", "Ratio", title=f"Comparison with baseline: {engine}")
+    rows = [
+        ("median wall time", baseline["summary"]["median_wall_time"], results["summary"]["median_wall_time"]),
+        ("total wall time", baseline["summary"]["total_wall_time"], results["summary"]["total_wall_time"]),
+    ]
+    for name in sorted(results["summary"]["phases"].keys() | baseline["summary"]["phases"].keys()):
+        rows.append((name, baseline["summary"]["phases"].get(name, 0), results["summary"]["phases"].get(name, 0)))
+    for name, before, after in rows:
+        ratio = f"{after / before:.2f}×" if before else "new"
+        table.add_row(name, f"{before:.3f}s", f"{after:.3f}s", ratio)
+    console.print(table)
+    for case_id, case in results["cases"].items():
+        if (before := baseline["cases"].get(case_id)) is not None and before["files"] != case["files"]:
+            console.print(f"{engine}, {case_id}: {before['files']} → {case['files']} files")
+
+
+def print_summary(engine: str, summary: dict[str, Any], console: Console) -> None:
+    """Print how the time of all renderings with `engine` splits into phases."""
+    table = Table("Phase", "Total", "Share", title=f"Generating projects: {engine}")
+    total = summary["total_wall_time"]
+    for name, t in sorted(summary["phases"].items(), key=lambda item: -item[1]):
+        table.add_row(name, f"{t:.2f}s", f"{t / total:.0%}")
+    table.add_row("wall time", f"{total:.2f}s", "100%")
+    console.print(table)
+    console.print(f"Median wall time per project: {summary['median_wall_time']:.3f}s")
+
+
+@app.default
+def main(
+    *,
+    repeat: int = 1,
+    sync: bool = False,
+    output: Path | None = None,
+    baseline: Path | None = None,
+    tolerance: float = 0.2,
+) -> None:
+    """
+    Benchmark generating projects for all combinations of the template’s options.
+
+    Parameters
+    ----------
+    repeat
+        render every combination this many times per engine, keeping the fastest run
+    sync
+        render like the template sync does (`_sync_render`), i.e. without creating a git repo or installing hooks
+    output
+        write the results to this JSON file
+    baseline
+        compare to the results in this JSON file
+    tolerance
+        with `baseline`, fail if the median wall time with `cookiecutter` is more than this fraction slower
+        than the baseline’s
+    """
+    console = Console()
+    renderer = TemplateRenderer(TEMPLATE)
+    engines: dict[str, Render] = {
+        "cookiecutter": render_cookiecutter,
+        "TemplateRenderer": lambda output_dir, context: renderer(
+            output_dir, cruft_log_file=output_dir / "cruft.log", extra_context=context
+        ),
+    }
+    cases: dict[str, dict[str, dict[str, Any]]] = {engine: {} for engine in engines}
+    matrix = list(option_matrix())
+    with console.status(f"Rendering {len(matrix)} combinations of options") as status:
+        for i, (case_id, context) in enumerate(matrix, 1):
+            for engine, render in engines.items():
+                status.update(f"Rendering {i}/{len(matrix)} with {engine}: {case_id}")
+                runs = [run_case(render, {**context, "_sync_render": sync}) for _ in range(repeat)]
+                cases[engine][case_id] = {"context": context, **min(runs, key=lambda r: r["wall_time"])}
+
+    results = {
+        "template_commit": renderer.commit,
+        "python": platform.python_version(),
+        "sync": sync,
+        "repeat": repeat,
+        "engines": {engine: {"summary": summarize(c), "cases": c} for engine, c in cases.items()},
+    }
+    for engine, engine_results in results["engines"].items():
+        print_summary(engine, engine_results["summary"], console)
+    files = sorted({c["files"] for engine_cases in cases.values() for c in engine_cases.values()})
+    console.print(f"Files per project: {files[0]} to {files[-1]}")
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2))
+
+    if baseline is not None:
+        ratio = compare(results, json.loads(baseline.read_text()), console)
+        sys.exit(ratio > 1 + tolerance)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,227 @@
+"""Offline end-to-end benchmark of `send-cruft-prs`.
+
+Creates synthetic instances of the template with varied contexts as local bare repositories,
+serves them through a local stand-in for the GitHub API (`testing.scverse_template_scripts.github.FakeGitHub`),
+and runs `cruft_prs.main` against them. Git URLs are redirected to the local repositories
+via `url.<base>.insteadOf` in the environment, so nothing touches the network.
+
+Reports repos per minute, the time per step (from the run’s trace), and the peak disk use of the run.
+Run from the `scripts` directory, e.g.::
+
+    python benchmarks/bench_sync.py --n-repos 20 --jobs 4
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import TYPE_CHECKING
+
+from cyclopts import App
+from git.repo import Repo
+from rich.console import Console
+from rich.table import Table
+
+from scverse_template_scripts import cruft_prs
+from scverse_template_scripts.render import TemplateRenderer
+from scverse_template_scripts.trace import tracer
+from testing.scverse_template_scripts.github import FakeGitHub, FakeRepo
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from typing import Any
+
+TEMPLATE_SRC = Path(__file__).parents[2]
+TEMPLATE = "scverse/cookiecutter-scverse"
+TAG = "v0.0.0-bench"
+
+app = App()
+
+
+def instance_contexts(n: int) -> Generator[dict[str, Any]]:
+    """Cookiecutter contexts that cover the template’s options."""
+    options = json.loads((TEMPLATE_SRC / "cookiecutter.json").read_text())
+    for i in range(n):
+        yield {
+            "project_name": f"bench-{i}",
+            # every third repo has a package name that doesn’t match the project name
+            **({"package_name": f"pkg{i}"} if i % 3 == 0 else {}),
+            "license": options["license"][i % len(options["license"])],
+            "ide_integration": i % 2 == 0,
+            "issue_categorization": options["issue_categorization"][i % len(options["issue_categorization"])],
+        }
+
+
+def create_template(git_root: Path) -> tuple[FakeRepo, Path]:
+    """Publish the template’s current commit as a release, and return it and a checkout."""
+    checkout = git_root.parent / "template"
+    with Repo.clone_from(TEMPLATE_SRC, checkout) as clone:
+        commit = clone.head.commit.hexsha
+        clone.create_tag(TAG)
+        Repo.clone_from(checkout, git_root / f"{TEMPLATE}.git", bare=True).close()
+        branch = clone.active_branch.name
+    return FakeRepo(TEMPLATE, commits=[commit], tags={TAG: commit}, default_branch=branch), checkout
+
+
+def create_instance(git_root: Path, renderer: TemplateRenderer, context: dict[str, Any]) -> FakeRepo:
+    """Render an instance of an earlier template version, and publish it as `bench/<project_name>`."""
+    full_name = f"bench/{context['project_name']}"
+    with TemporaryDirectory() as td:
+        project_dir = renderer(Path(td), cruft_log_file=Path(td, "cruft.log"), extra_context=context)
+        # pretend the instance was created from an older template commit and was edited since
+        cruft_config = json.loads((project_dir / ".cruft.json").read_text())
+        cruft_config.update(template=f"https://github.com/{TEMPLATE}", commit="0" * 40)
+        (project_dir / ".cruft.json").write_text(json.dumps(cruft_config, indent=2) + "\n")
+        with (project_dir / "pyproject.toml").open("a") as f:
+            f.write("\n# local change\n")
+        with Repo(project_dir) as repo:
+            repo.git.add("-A")
+            repo.git.commit("-m", "Local changes", "--no-verify", "--no-gpg-sign")
+            commits = repo.git.rev_list("--reverse", "HEAD").split()
+            branch = repo.active_branch.name
+            Repo.clone_from(project_dir, git_root / f"{full_name}.git", bare=True).close()
+        files = {".cruft.json": (project_dir / ".cruft.json").read_text()}
+    return FakeRepo(full_name, commits=commits, files=files, default_branch=branch)
+
+
+class DiskMonitor(threading.Thread):
+    """Samples the total size of files in some directories, keeping the maximum."""
+
+    def __init__(self, *paths: Path, interval: float = 0.2) -> None:
+        super().__init__(daemon=True)
+        self.paths = paths
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, sum(map(_du, self.paths)))
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+def _du(path: Path) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for f in files:
+            with contextlib.suppress(FileNotFoundError):  # removed while walking
+                total += Path(root, f).lstat().st_size
+    return total
+
+
+@app.default
+def main(
+    *,
+    n_repos: int = 10,
+    jobs: int = 4,
+    work_dir: Path | None = None,
+    checkout: bool = True,
+    fork_ahead: bool = False,
+    cache: bool = False,
+    preview: bool = False,
+    output: Path | None = None,
+) -> None:
+    """
+    Benchmark a template sync run over synthetic repos.
+
+    Parameters
+    ----------
+    n_repos
+        number of template instances to update
+    jobs
+        number of repos each step works on concurrently (see `send-cruft-prs --jobs`)
+    work_dir
+        directory for the repositories, logs, and temporary files (a temporary directory by default)
+    checkout
+        see `send-cruft-prs --checkout`
+    fork_ahead
+        see `send-cruft-prs --fork-ahead`
+    cache
+        use a repository cache (see `send-cruft-prs --cache-dir`)
+    preview
+        see `send-cruft-prs --preview`. Counts the written patches instead of created PRs.
+    output
+        write the results to this JSON file
+    """
+    console = Console()
+    with TemporaryDirectory() as td:
+        work = (work_dir or Path(td)).absolute()
+        git_root, log_dir, tmp = work / "git", work / "logs", work / "tmp"
+        tmp.mkdir(parents=True)
+        with console.status(f"Creating {n_repos} template instances"):
+            template, template_checkout = create_template(git_root)
+            renderer = TemplateRenderer(template_checkout)
+            instances = [create_instance(git_root, renderer, ctx) for ctx in instance_contexts(n_repos)]
+
+        with FakeGitHub(git_root=git_root) as server:
+            for repo in [template, *instances]:
+                server.add(repo)
+            os.environ.update(server.git_env("https://github.com/"), GITHUB_TOKEN="", GITHUB_API_URL=server.base_url)
+            # clones and renderings go to temporary directories, so measure them there
+            tempfile.tempdir = str(tmp)
+            monitor = DiskMonitor(git_root, tmp, work / "cache")
+            monitor.start()
+            start = time.perf_counter()
+            failed = False
+            try:
+                cruft_prs.main(
+                    TAG,
+                    [f"https://github.com/{repo.full_name}" for repo in instances],
+                    log_dir=log_dir,
+                    jobs=jobs,
+                    cache_dir=work / "cache" if cache else None,
+                    checkout=checkout,
+                    fork_ahead=fork_ahead,
+                    preview=preview,
+                )
+            except SystemExit as e:
+                failed = bool(e.code)
+            duration = time.perf_counter() - start
+            peak_disk = monitor.stop()
+            tempfile.tempdir = None
+            n_prs = sum(len(repo.prs) for repo in instances)
+            if preview:
+                n_prs = len(list((log_dir / "preview").glob("*.patch")))
+
+    step_times: dict[str, float] = defaultdict(float)
+    for s in tracer.spans:
+        if s.category == "step":
+            step_times[s.name] += s.duration
+    results = {
+        "n_repos": n_repos,
+        "jobs": jobs,
+        "duration": duration,
+        "repos_per_minute": n_repos / duration * 60,
+        "peak_disk_bytes": peak_disk,
+        "prs_created": n_prs,
+        "failed": failed,
+        "step_seconds_per_repo": {name: t / n_repos for name, t in step_times.items()},
+    }
+    table = Table("Metric", "Value", title="Benchmark results")
+    table.add_row("Repos", str(n_repos))
+    table.add_row("PRs created", str(n_prs))
+    table.add_row("Wall time", f"{duration:.1f}s")
+    table.add_row("Throughput", f"{results['repos_per_minute']:.1f} repos/min")
+    table.add_row("Peak disk use", f"{peak_disk / 1e6:.1f} MB")
+    for name, t in results["step_seconds_per_repo"].items():
+        table.add_row(f"{name} step", f"{t:.2f}s per repo")
+    console.print(table)
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2))
+    sys.exit(failed or n_prs != n_repos)
+
+
+if __name__ == "__main__":
+    app()
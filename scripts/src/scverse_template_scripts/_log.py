@@ -1,11 +1,39 @@
 from __future__ import annotations
 
-from logging import basicConfig, getLogger
+import contextlib
+import threading
+from logging import FileHandler, Formatter, basicConfig, getLogger
+from typing import TYPE_CHECKING
 
-from rich.logging import RichHandler
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from logging import LogRecord
+    from pathlib import Path
 
 log = getLogger(__name__)
 
 
 def setup_logging() -> None:
+    from rich.logging import RichHandler
+
     basicConfig(level="INFO", handlers=[RichHandler()])
+
+
+@contextlib.contextmanager
+def log_to_file(path: Path) -> Generator[None]:
+    """Additionally write all log records emitted by the current thread to `path`."""
+    thread = threading.get_ident()
+
+    def is_current_thread(record: LogRecord) -> bool:
+        return record.thread == thread
+
+    handler = FileHandler(path)
+    handler.setFormatter(Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler.addFilter(is_current_thread)
+    root = getLogger()
+    root.addHandler(handler)
+    try:
+        yield
+    finally:
+        root.removeHandler(handler)
+        handler.close()
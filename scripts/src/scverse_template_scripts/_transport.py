@@ -0,0 +1,113 @@
+"""Thread-safe HTTP transport for PyGithub.
+
+PyGithub stores the pending request on its (shared, persistent) connection object
+between `request()` and `getresponse()`, so concurrent API calls can receive each other’s responses.
+The connections here are created per request instead, but share one `requests.Session` per host,
+so we keep connection pooling without sharing any per-request state between threads.
+All requests of a client also pass through its `RateLimiter`.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass
+
+from .ratelimit import RateLimiter
+from .trace import span
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Any
+
+    import requests
+    from github import Github
+    from github.Requester import RequestsResponse
+
+
+@dataclass
+class Transport:
+    """
+    Connections of one `Github` client, which share a `requests.Session` per host and a `RateLimiter`.
+
+    Use `install` to make a client use it.
+    """
+
+    limiter: RateLimiter = field(default_factory=RateLimiter)
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _prototypes: dict[tuple[Any, ...], dict[str, Any]] = field(default_factory=dict, init=False, repr=False)
+    """Attributes (including the session) of the first connection per class, host, and settings"""
+
+    def http(self, host: str, port: int | None = None, **kwargs: Any) -> ThreadSafeHTTPConnection:  # noqa: ANN401
+        return ThreadSafeHTTPConnection(host, port, transport=self, **kwargs)
+
+    def https(self, host: str, port: int | None = None, **kwargs: Any) -> ThreadSafeHTTPSConnection:  # noqa: ANN401
+        return ThreadSafeHTTPSConnection(host, port, transport=self, **kwargs)
+
+    def shared(self, key: tuple[Any, ...], create: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """Attributes of the first connection with `key`, which are created by `create` if there is none yet."""
+        with self._lock:
+            if (attrs := self._prototypes.get(key)) is None:
+                attrs = self._prototypes[key] = create()
+        return attrs
+
+    def install(self, gh: Github) -> None:
+        """
+        Make `gh` use this transport.
+
+        Only this client is affected, unlike with `Requester.injectConnectionClasses`.
+        Pass `seconds_between_requests=None, seconds_between_writes=None` to `Github`
+        to disable PyGithub’s own (not thread-safe) throttling.
+        """
+        requester = gh.requester
+        # PyGithub only offers to replace the connection classes globally, so set its per-instance attributes
+        vars(requester).update(
+            _Requester__httpConnectionClass=self.http,
+            _Requester__httpsConnectionClass=self.https,
+            _Requester__connectionClass=self.https if urlparse(requester.base_url).scheme == "https" else self.http,
+        )
+
+
+class _SharedSessionMixin:
+    """Connection that is created per request but reuses the `requests.Session` of its host."""
+
+    transport: Transport
+    protocol: str
+    host: str
+    port: int
+    session: requests.Session
+    verb: str
+    url: str
+
+    def __init__(self, host: str, port: int | None = None, *, transport: Transport, **kwargs: Any) -> None:  # noqa: ANN401
+        def create() -> dict[str, Any]:
+            super(_SharedSessionMixin, self).__init__(host, port, **kwargs)
+            return dict(vars(self))
+
+        # only the first connection runs PyGithub’s constructor, which creates a session and connection pool
+        vars(self).update(transport.shared((type(self), host, port, *sorted(kwargs.items())), create))
+        self.transport = transport
+
+    def getresponse(self) -> RequestsResponse:
+        limiter = self.transport.limiter
+        limiter.acquire(self.verb, self.url)
+        name = "graphql" if self.url.endswith("/graphql") else self.verb
+        with span(name, "github", url=self.url):
+            response = super().getresponse()  # type: ignore[misc]
+        limiter.update(response.headers)
+        return response
+
+    def close(self) -> None:
+        """Keep the shared session open, other connections to the same host are still using it."""
+
+
+class ThreadSafeHTTPConnection(_SharedSessionMixin, HTTPRequestsConnectionClass):
+    pass
+
+
+class ThreadSafeHTTPSConnection(_SharedSessionMixin, HTTPSRequestsConnectionClass):
+    pass
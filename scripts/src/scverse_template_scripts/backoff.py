@@ -1,29 +1,195 @@
+"""Retrying of operations that fail until some backend is ready, e.g. a new fork.
+
+A `RetryPolicy` decides which errors are retried, how long to wait in between (its `Schedule`),
+and when to give up (a number of attempts and/or a deadline).
+Each policy keeps statistics about its call site, which are available via `retry_stats`.
+"""
+
 from __future__ import annotations
 
 import random
+import threading
 import time
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Protocol
 
 from ._log import log
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
-
-
-def retry_with_backoff[T](
-    fn: Callable[[], T],
-    retries: int = 5,
-    backoff_in_seconds: int | float = 1,
-    exc_cls: type = Exception,
-) -> T:
-    exc: Exception | None = None
-    for x in range(retries or 1):
-        try:
-            return fn()
-        except exc_cls as _exc:
-            exc = _exc
-            sleep = backoff_in_seconds * 2**x + random.uniform(0, 1)
-            log.info(f"Action failed. Retrying in {sleep}s.")
-            time.sleep(sleep)
-    assert exc is not None
-    raise exc
+    from collections.abc import Awaitable, Callable
+
+
+class Schedule(Protocol):
+    def __call__(self, attempt: int, previous: float) -> float:
+        """Seconds to sleep after failed `attempt` (starting at 0), given the previous sleep (0 at first)."""
+
+
+@dataclass(frozen=True)
+class Exponential:
+    """Sleep `base * factor**attempt` seconds (at most `cap`), plus up to `jitter` seconds."""
+
+    base: float = 1
+    factor: float = 2
+    cap: float = float("inf")
+    jitter: float = 1
+
+    def __call__(self, attempt: int, previous: float) -> float:  # noqa: ARG002
+        return min(self.cap, self.base * self.factor**attempt) + random.uniform(0, self.jitter)
+
+
+@dataclass(frozen=True)
+class DecorrelatedJitter:
+    """
+    Sleep a random time between `base` and three times the previous sleep (at most `cap`).
+
+    This grows about as fast as exponential backoff, but doesn’t overshoot by minutes
+    once the sleeps get long, and spreads out concurrent callers.
+    See https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+    """
+
+    base: float = 1
+    cap: float = 30
+
+    def __call__(self, attempt: int, previous: float) -> float:  # noqa: ARG002
+        return min(self.cap, random.uniform(self.base, max(previous, self.base) * 3))
+
+
+def on_exceptions(*exc_types: type[BaseException]) -> Callable[[BaseException], bool]:
+    """Retry predicate for errors of the given types."""
+    return lambda exc: isinstance(exc, exc_types)
+
+
+def on_status(*statuses: int) -> Callable[[BaseException], bool]:
+    """Retry predicate for GitHub API errors with the given HTTP status codes."""
+    from github import GithubException
+
+    return lambda exc: isinstance(exc, GithubException) and exc.status in statuses
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """The time in seconds the GitHub API asks to wait before retrying (`retry-after` or an exhausted rate limit)."""
+    from github import GithubException
+
+    if not isinstance(exc, GithubException) or not exc.headers:
+        return None
+    headers = {k.lower(): v for k, v in exc.headers.items()}
+    if "retry-after" in headers:
+        return float(headers["retry-after"])
+    if headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+        return max(float(headers["x-ratelimit-reset"]) - time.time(), 0)
+    return None
+
+
+@dataclass
+class RetryStats:
+    """Counters for all calls made with the policies of one call site."""
+
+    calls: int = 0
+    attempts: int = 0
+    slept: float = 0
+
+    def __str__(self) -> str:
+        return f"{self.attempts} attempts in {self.calls} calls, slept {self.slept:.1f}s"
+
+
+_stats: dict[str, RetryStats] = {}
+_stats_lock = threading.Lock()
+
+
+def retry_stats() -> dict[str, RetryStats]:
+    """Statistics per call site (`RetryPolicy.name`) of all retried calls so far."""
+    with _stats_lock:
+        return {name: RetryStats(s.calls, s.attempts, s.slept) for name, s in _stats.items()}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How to retry a call, to be used as `policy(fn)` or `await policy.acall(fn)`.
+
+    Parameters
+    ----------
+    name
+        name of the call site, for logging and `retry_stats`
+    retry_on
+        predicate for errors that should be retried, e.g. `on_exceptions(...)` or `on_status(...)`.
+        Other errors are raised immediately.
+    schedule
+        how long to sleep between attempts. A `Retry-After` of a GitHub API error takes precedence.
+    max_attempts
+        maximum number of attempts (None for no limit)
+    deadline
+        maximum number of seconds from the first attempt to the last (None for no limit).
+        The last sleep is shortened so the last attempt happens at the deadline.
+    """
+
+    name: str
+    retry_on: Callable[[BaseException], bool]
+    schedule: Schedule = field(default_factory=Exponential)
+    max_attempts: int | None = 5
+    deadline: float | None = None
+
+    def __call__[T](self, fn: Callable[[], T]) -> T:
+        state = _Attempts(self)
+        while True:
+            try:
+                return fn()
+            except Exception as exc:
+                if (delay := state.failed(exc)) is None:
+                    raise
+            time.sleep(delay)
+            state.slept(delay)
+
+    async def acall[T](self, fn: Callable[[], Awaitable[T]]) -> T:
+        import asyncio
+
+        state = _Attempts(self)
+        while True:
+            try:
+                return await fn()
+            except Exception as exc:
+                if (delay := state.failed(exc)) is None:
+                    raise
+            await asyncio.sleep(delay)
+            state.slept(delay)
+
+
+@dataclass
+class _Attempts:
+    """The progress of one call with a `RetryPolicy`."""
+
+    policy: RetryPolicy
+    start: float = field(default_factory=time.monotonic)
+    attempt: int = 0
+    previous: float = 0
+    stats: RetryStats = field(init=False)
+
+    def __post_init__(self) -> None:
+        with _stats_lock:
+            self.stats = _stats.setdefault(self.policy.name, RetryStats())
+            self.stats.calls += 1
+            self.stats.attempts += 1
+
+    def failed(self, exc: BaseException) -> float | None:
+        """Record a failed attempt and return how long to sleep before the next one (None to give up)."""
+        p = self.policy
+        self.attempt += 1
+        if not p.retry_on(exc) or (p.max_attempts is not None and self.attempt >= p.max_attempts):
+            return None
+        delay = retry_after(exc)
+        if delay is None:
+            delay = p.schedule(self.attempt - 1, self.previous)
+        if p.deadline is not None:
+            remaining = p.deadline - (time.monotonic() - self.start)
+            if remaining <= 0:
+                return None
+            delay = min(delay, remaining)
+        log.info(f"{p.name} failed ({type(exc).__name__}). Retrying in {delay:.1f}s.")
+        return delay
+
+    def slept(self, delay: float) -> None:
+        """Record a sleep before the next attempt."""
+        self.previous = delay
+        with _stats_lock:
+            self.stats.slept += delay
+            self.stats.attempts += 1
@@ -7,39 +7,53 @@ from __future__ import annotations
 
 import contextlib
 import json
-import math
 import os
 import re
+import shutil
 import sys
-from collections.abc import Iterable
+from collections.abc import Iterable  # noqa: TC003  # cyclopts evaluates the annotations of `main`
 from dataclasses import KW_ONLY, InitVar, dataclass, field
-from glob import glob
+from functools import partial
 from pathlib import Path
 from subprocess import run
 from tempfile import TemporaryDirectory
+from types import MappingProxyType
 from typing import TYPE_CHECKING, ClassVar, TypedDict, cast
 
-from cyclopts import App
-from furl import furl
-from git.exc import GitCommandError
-from git.repo import Repo
-from git.util import Actor
-from github import Auth, Github, UnknownObjectException
-from yaml import safe_load
-
-from ._log import log, setup_logging
-from .backoff import retry_with_backoff
+from ._log import log, log_to_file, setup_logging
+from .backoff import DecorrelatedJitter, RetryPolicy, on_exceptions, retry_stats
+from .forks import ForkPoller
+from .journal import Journal
+from .mirror import MirrorCache
+from .pipeline import Pipeline, Stage
+from .preflight import snapshot_repos
+from .prs import PRCache, PRInfo, find_prs
+from .ratelimit import RateLimiter
+from .render import RenderCache, TemplateRenderer, render_template
+from .shards import Shard
+from .sync import path_matcher, scan_tree, sync_tree
+from .trace import span, tracer
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, Sequence
-    from typing import IO, Literal, LiteralString, NotRequired
+    from collections.abc import Callable, Generator, Mapping, Sequence
+    from concurrent.futures import Future
+    from typing import IO, Any, Literal, LiteralString, NotRequired
 
+    from git.repo import Repo
+    from git.util import Actor
+    from github import Github
     from github.ContentFile import ContentFile
     from github.GitRelease import GitRelease as GHRelease
     from github.NamedUser import NamedUser
-    from github.PullRequest import PullRequest
     from github.Repository import Repository as GHRepo
 
+    from .preflight import RepoSnapshot
+
+# The heavy dependencies (github, git, furl, yaml, cyclopts, cookiecutter, rich) are imported
+# in the functions that use them, so the CLI and the helper processes start fast.
+# `tests/test_import_time.py` makes sure it stays that way.
+
+GITHUB_API_URL = "https://api.github.com"
 
 PR_BODY_TEMPLATE = """\
 `cookiecutter-scverse` released [{release.tag_name}]({release.html_url}).
@@ -61,14 +75,17 @@ PR_BODY_TEMPLATE = """\
 [codecov]: {template_usage}#coverage-tests-with-codecov
 """
 
-# GitHub says that up to 5 minutes of waiting for a fork are OK,
-# So we error our once we wait longer, i.e. when 2ⁿ = 5 min × 60 sec/min
-N_RETRIES_WAIT_FOR_FORK = math.ceil(math.log(5 * 60) / math.log(2))  # = ⌈~8.22⌉ = 9
-# Due to exponential backoff, we’ll maximally wait 2⁹ sec, or 8.5 min
+# GitHub says that up to 5 minutes of waiting for a fork are OK, so we error out once we waited longer.
+# Sleeps are capped, so we notice within half a minute when the fork is ready.
+WAIT_FOR_FORK = 5 * 60
+WAIT_FOR_FORK_SCHEDULE = DecorrelatedJitter(base=1, cap=30)
 
 # For the following variables, always use the template version
 # (remove them from the cookiecutter context provided by the instance during update)
 COOKIECUTTER_VARS_OVERRIDE_FROM_TEMPLATE = ["_copy_without_render", "_exclude_on_template_update"]
+# Tells the template’s hooks that the rendered project is only synced into the target repo,
+# so they skip creating a git repo with an initial commit and installing the git hooks.
+SYNC_RENDER_VAR = "_sync_render"
 
 
 def _escape_github_mentions(text: str) -> str:
@@ -112,13 +129,29 @@ class GitHubConnection:
     token: str | None = field(repr=False, default=None)
     _: KW_ONLY
     email: str | None = field(default=None)
+    base_url: str = GITHUB_API_URL
+    """URL of the GitHub API, e.g. for GitHub Enterprise Server or a local stand-in"""
+    limiter: RateLimiter = field(default_factory=RateLimiter)
 
     gh: Github = field(init=False)
     user: NamedUser = field(init=False)
     sig: Actor = field(init=False)
 
     def __post_init__(self, _login: str) -> None:
-        self.gh = Github(auth=Auth.Token(self.token) if self.token else None)
+        from git.util import Actor
+        from github import Auth, Github
+
+        from . import _transport
+
+        # the limiter takes care of spacing requests
+        self.gh = Github(
+            auth=Auth.Token(self.token) if self.token else None,
+            base_url=self.base_url,
+            seconds_between_requests=None,
+            seconds_between_writes=None,
+        )
+        # repos are processed concurrently, so the client needs to be thread-safe
+        _transport.Transport(self.limiter).install(self.gh)
         self.user = cast("NamedUser", self.gh.get_user(_login))
         if self.email is None:
             self.email = self.user.email
@@ -129,6 +162,8 @@ class GitHubConnection:
         return self.user.login
 
     def auth(self, url_str: str) -> str:
+        from furl import furl
+
         url = furl(url_str)
         if self.token:
             url.username = self.token
@@ -200,14 +235,39 @@ class TemplateUpdatePR:
         )
         return _escape_github_mentions(body)
 
-    def matches_prefix(self, pr: PullRequest) -> bool:
+    def matches_prefix(self, pr: PRInfo) -> bool:
         """Check if `pr` is either a current or previous template update PR by matching the branch name"""
         # Don’t compare title prefix, people might rename PRs
-        return pr.head.ref.startswith(self.branch_prefix) and pr.user.id == self.con.user.id
+        return pr["head_ref"].startswith(self.branch_prefix) and pr["author"] == self.con.login
 
-    def matches_current_version(self, pr: PullRequest) -> bool:
+    def matches_current_version(self, pr: PRInfo) -> bool:
         """Check if `pr` is a template update PR for the current version"""
-        return pr.head.ref == self.pr_branch and pr.user.id == self.con.user.id
+        return pr["head_ref"] == self.pr_branch and pr["author"] == self.con.login
+
+    def find_existing(self, repo: GHRepo, cache: PRCache | None = None) -> list[PRInfo]:
+        """
+        Find all current and previous template update PRs in `repo`.
+
+        If `cache` already knows a PR for the current version, no request is made.
+        Otherwise, a single search request is made and its result added to `cache`.
+        """
+        known = [] if cache is None else cache.load(self.repo_id)
+        if any(self.matches_current_version(p) for p in known):
+            log.info("Found PR for the current version in the cache")
+            return known
+        prs = find_prs(self.con.gh, repo.full_name, author=self.con.login, head_prefix=self.branch_prefix)
+        return prs if cache is None else cache.update(self.repo_id, prs)
+
+    def find_current(self, repo: GHRepo) -> PRInfo | None:
+        """
+        Find the PR for the current version in `repo` by its exact head branch.
+
+        Unlike the search in `find_existing`, this also finds PRs that the search index doesn’t know yet.
+        """
+        for pull in repo.get_pulls(state="all", head=self.namespaced_head):
+            state = "merged" if pull.merged_at is not None else "open" if pull.state == "open" else "closed"
+            return PRInfo(number=pull.number, head_ref=pull.head.ref, state=state, author=self.con.login)
+        return None
 
 
 class RepoInfo(TypedDict):
@@ -230,6 +290,8 @@ def get_template_release(gh: Github, template_url: str, tag_name: str) -> Templa
 
 
 def _parse_repos(f: IO[str] | str | bytes) -> list[RepoInfo]:
+    from yaml import safe_load
+
     repos = cast("list[RepoInfo]", safe_load(f))
     log.info(f"Found {len(repos)} known repos")
     return repos
@@ -261,18 +323,32 @@ def get_fork(con: GitHubConnection, repo: GHRepo) -> GHRepo:
     repo
         Reference to the *original* github repo that uses the template (i.e. not the fork)
     """
+    from github import UnknownObjectException
+
     log.info(f"Creating fork for {repo.url}")
     fork = repo.create_fork()
-    return retry_with_backoff(
-        lambda: con.gh.get_repo(fork.id),
-        retries=N_RETRIES_WAIT_FOR_FORK,
-        exc_cls=UnknownObjectException,
+    policy = RetryPolicy(
+        "wait for fork",
+        on_exceptions(UnknownObjectException),
+        WAIT_FOR_FORK_SCHEDULE,
+        max_attempts=None,
+        deadline=WAIT_FOR_FORK,
     )
+    return policy(lambda: con.gh.get_repo(fork.id))
 
 
+@contextlib.contextmanager
 def _clone_and_prepare_repo(
-    con: GitHubConnection, clone_dir: Path, template_branch_name: str, *, forked_repo: GHRepo, original_repo: GHRepo
-) -> Repo:
+    con: GitHubConnection,
+    clone_dir: Path,
+    template_branch_name: str,
+    *,
+    forked_repo: GHRepo,
+    original_repo: GHRepo,
+    cache: MirrorCache | None = None,
+    checkout: bool = True,
+    root_commit: str | None = None,
+) -> Generator[Repo]:
     """
     Clone the forked repo and set up branches and remotes.
 
@@ -294,49 +370,82 @@ def _clone_and_prepare_repo(
         reference to the original repo (to be set as upstream)
     template_branch_name
         branch to contain the repo template (to be added to fork)
+    cache
+        If given, fetch into a cached bare repository and check out a worktree of it
+        instead of making a fresh clone.
+    checkout
+        If False, only create the `{template_branch_name}` branch, leaving the working tree empty.
+    root_commit
+        The initial commit of the default branch, if already known (e.g. from a `RepoSnapshot`)
     """
-    # Clone the repo with blob filtering for better performance
-    log.info(f"Cloning {forked_repo.clone_url} into {clone_dir}")
-    clone = retry_with_backoff(
-        lambda: Repo.clone_from(con.auth(forked_repo.clone_url), clone_dir, filter="blob:none"),
-        retries=N_RETRIES_WAIT_FOR_FORK,
-        exc_cls=GitCommandError,
-    )
-
-    # Add original repo as remote
-    upstream = clone.create_remote(name="upstream", url=original_repo.clone_url)
-    upstream.fetch()
+    from git.exc import GitCommandError
+    from git.repo import Repo
 
     # Get the default branch
     default_branch = original_repo.default_branch
+    # a new fork might not be ready for cloning yet
+    retry = RetryPolicy(
+        "clone fork",
+        on_exceptions(GitCommandError),
+        WAIT_FOR_FORK_SCHEDULE,
+        max_attempts=None,
+        deadline=WAIT_FOR_FORK,
+    )
 
-    # Check if the branch already exists in the forked repo
-    remote_refs = [ref.name for ref in clone.remote("origin").refs]
-    full_branch_name = f"origin/{template_branch_name}"
+    if cache is None:
+        # Clone the repo with blob filtering for better performance
+        log.info(f"Cloning {forked_repo.clone_url} into {clone_dir}")
+        with span("git clone", "git"):
+            clone_cm = retry(
+                lambda: Repo.clone_from(
+                    con.auth(forked_repo.clone_url), clone_dir, filter="blob:none", no_checkout=not checkout
+                )
+            )
+        # Add original repo as remote
+        upstream = clone_cm.create_remote(name="upstream", url=original_repo.clone_url)
+        with span("git fetch upstream", "git"):
+            upstream.fetch()
+    else:
+        clone_cm = cache.worktree(
+            original_repo.full_name.replace("/", "-"),
+            clone_dir,
+            origin=con.auth(forked_repo.clone_url),
+            upstream=original_repo.clone_url,
+            start=f"upstream/{default_branch}",
+            retry=retry,
+        )
 
-    # create and/or checkout template-update branch
-    if full_branch_name not in remote_refs:
-        log.info(f"Branch {template_branch_name} does not exists yet, creating it from initial commit")
-        # Get the initial commit on the default branch
-        initial_commit = next(clone.iter_commits(default_branch, reverse=True))
+    with clone_cm as clone:
+        # Check if the branch already exists in the forked repo
+        remote_refs = [ref.name for ref in clone.remote("origin").refs]
+        full_branch_name = f"origin/{template_branch_name}"
 
-        # Create and checkout a new branch from the initial commit
-        branch = clone.create_head(template_branch_name, initial_commit.hexsha)
-        branch.checkout()
-    else:
-        log.info(f"Branch {template_branch_name} already exists, checking it out")
-        branch = clone.create_head(template_branch_name, full_branch_name)
-        branch.checkout()
+        # create and/or checkout template-update branch
+        if full_branch_name not in remote_refs:
+            log.info(f"Branch {template_branch_name} does not exists yet, creating it from initial commit")
+            # Get the initial commit on the default branch
+            start = root_commit or next(clone.iter_commits(f"upstream/{default_branch}", reverse=True)).hexsha
+        else:
+            log.info(f"Branch {template_branch_name} already exists, checking it out")
+            start = full_branch_name
+        # (a cached repository might still have the branch from an earlier run)
+        branch = clone.create_head(template_branch_name, start, force=True)
+        if checkout:
+            branch.checkout()
 
-    return clone
+        yield clone
 
 
 class CruftConfig(TypedDict):
+    commit: NotRequired[str]
+    checkout: NotRequired[str | None]
     context: dict[Literal["cookiecutter"], dict[str, str]]
 
 
 def _get_cruft_config_from_upstream(repo: Repo, default_branch: str) -> CruftConfig:
     """Get cruft config from the default branch in the upstream repo"""
+    from git.exc import GitCommandError
+
     log.info(f"Getting .cruft.json from the {default_branch} branch in {repo.remote('upstream').url}")
     try:
         # Try to get .cruft.json from the latest commit in upstream's default branch
@@ -350,18 +459,71 @@ def _get_cruft_config_from_upstream(repo: Repo, default_branch: str) -> CruftCon
     return cruft_config
 
 
+def _get_cruft_config_from_api(repo: GHRepo) -> CruftConfig:
+    """Get cruft config from the default branch of `repo` via the API, without cloning it"""
+    from github import UnknownObjectException
+
+    log.info(f"Getting .cruft.json from the {repo.default_branch} branch of {repo.full_name}")
+    try:
+        file = cast("ContentFile", repo.get_contents(".cruft.json"))
+    except UnknownObjectException:
+        msg = "No .cruft.json found in repository"
+        raise FileNotFoundError(msg) from None
+    return cast("CruftConfig", json.loads(file.decoded_content))
+
+
+def _render_update(
+    cookiecutter_config: dict,
+    *,
+    cruft_log_file: Path,
+    template_dir: str,
+    render_cache: RenderCache | None = None,
+    cleanup: contextlib.ExitStack,
+) -> Path:
+    """
+    Instantiate the cookiecutter template with the config used by the target repo.
+
+    Parameters
+    ----------
+    cookiecutter_config
+        cookiecutter configuration to be passed to cruft as `--extra-context-file`
+    cruft_log_file
+        file to which the cruft log will be written
+    template_dir
+        path to the template (cloned git repository, already checked out at the desired tag)
+    render_cache
+        If given, reuse the rendered template of a repo with the same configuration (must use `template_dir`)
+    cleanup
+        Exit stack to register the removal of the rendered template with (unless it’s in `render_cache`)
+
+    Returns
+    -------
+    The directory containing the rendered project
+    """
+    extra_context = {k: v for k, v in cookiecutter_config.items() if k not in COOKIECUTTER_VARS_OVERRIDE_FROM_TEMPLATE}
+    extra_context[SYNC_RENDER_VAR] = True
+    if render_cache is not None:
+        return render_cache.get(cruft_log_file=cruft_log_file, extra_context=extra_context)
+    output_dir = Path(cleanup.enter_context(TemporaryDirectory()))
+    return render_template(
+        output_dir, cruft_log_file=cruft_log_file, extra_context=extra_context, template_dir=template_dir
+    )
+
+
 def _apply_update(
     clone: Repo,
     *,
     cruft_log_file: Path,
     cookiecutter_config: dict,
     template_dir: str,
+    render_cache: RenderCache | None = None,
 ) -> None:
     """
     Apply the changes from the template to the target repo.
 
     Instantiate the cookiecutter template with the config used by the target repo.
-    Then remove everything from the target repo and copy over all template files.
+    Then make the target repo contain exactly the template files, only writing the ones that changed
+    and leaving the ones matching the template’s `_exclude_on_template_update` patterns alone.
 
     The outcome is a branch in the target repo that contains the updated template that can be merged
     into the default branch by the user.
@@ -376,58 +538,30 @@ def _apply_update(
         cookiecutter configuration to be passed to cruft as `--extra-context-file`
     template_dir
         path to the template (cloned git repository, already checked out at the desired tag)
+    render_cache
+        If given, reuse the rendered template of a repo with the same configuration (must use `template_dir`)
     """
     clone_dir = Path(clone.working_dir)
-    with TemporaryDirectory() as td:
-        output_dir = Path(td)
-        # Initialize a new repo off the current template version, using the configuration from .cruft.json
-        cookiecutter_config_file = output_dir / "cookiecutter.json"
-        with cookiecutter_config_file.open("w") as f:
-            # need to put the cookiecutter-related info from .cruft.json into separate file
-            json.dump(
-                {k: v for k, v in cookiecutter_config.items() if k not in COOKIECUTTER_VARS_OVERRIDE_FROM_TEMPLATE}, f
-            )
-
-        # run in a subprocess, otherwise not possible to capture output of post-run hooks
-        with cruft_log_file.open("w") as log_f:
-            # Do not specify --checkout to point to a specific tag.
-            # The correct version is already checked out in `template_dir`
-            cmd = [
-                sys.executable,
-                "-m",
-                "cruft",
-                "create",
-                template_dir,
-                "--no-input",
-                f"--extra-context-file={cookiecutter_config_file}",
-            ]
-            log.info("Running " + " ".join(cmd))
-            run(cmd, stdout=log_f, stderr=log_f, check=True, cwd=output_dir)
-        template_dir_project_name = output_dir / cookiecutter_config["project_name"]
-
-        # Remove everything from the original repo (except the `.git` directoroy)
-        cmd = ["/usr/bin/find", ".", "-not", "-path", "./.git*", "-delete"]
-        log.info("Running " + " ".join(cmd) + f" in {clone_dir}")
-        run(cmd, check=True, cwd=clone_dir)
-
-        # move over the contents from the new directory into the emptied git repo
-        cmd = [
-            "/usr/bin/rsync",
-            "-Pva",
-            "--exclude",
-            ".git",
-            f"{template_dir_project_name.absolute()}/",
-            f"{clone_dir.absolute()}/",
-        ]
-        log.info("Running " + " ".join(repr(a) if " " in a else a for a in cmd))
-        run(cmd, check=True, capture_output=True)
+    with contextlib.ExitStack() as stack:
+        template_dir_project_name = _render_update(
+            cookiecutter_config,
+            cruft_log_file=cruft_log_file,
+            template_dir=template_dir,
+            render_cache=render_cache,
+            cleanup=stack,
+        )
+        # Update the original repo to match the template, keeping unchanged and excluded files untouched
+        exclude = path_matcher(_get_exclude_patterns(template_dir_project_name))
+        with span("sync tree", "render"):
+            stats = sync_tree(template_dir_project_name, clone_dir, exclude=exclude)
+        log.info(f"Synced template into {clone_dir}: {stats}")
 
 
 def _commit_update(clone: Repo, *, exclude_files: Sequence = (), commit_msg: str, commit_author: str) -> bool:
     """
     Check if changes were made, and if yes, commit them.
 
-    Glob patterns in `exclude_files` will not be staged for the commit.
+    Glob patterns in `exclude_files` (see `PathMatcher`) will not be staged for the commit.
 
     Returns a `bool` indicating whether changes have been made and committed.
     """
@@ -441,10 +575,11 @@ def _commit_update(clone: Repo, *, exclude_files: Sequence = (), commit_msg: str
     clone.git.add(A=True)
     # unstage the files that we want to exclude from the template update
     log.info(f"Excluding files from patterns: {exclude_files}")
-    for glob_pattern in exclude_files:
-        # need to check if pattern matches anything, because
-        if len(glob(glob_pattern, root_dir=clone.working_dir)):
-            clone.git.restore(glob_pattern, staged=True)
+    exclude = path_matcher(exclude_files)
+    staged = clone.git.diff_index("HEAD", cached=True, name_only=True, z=True).split("\0")
+    if excluded := [path for path in staged if path and exclude(path)]:
+        # a single call for all paths, which are passed literally (they were already matched)
+        clone.git.restore("--", *excluded, staged=True, env={"GIT_LITERAL_PATHSPECS": "1"})
 
     # Check if there are any staged changes for commit
     if not clone.git.diff_index("HEAD", cached=True, name_only=True):
@@ -455,107 +590,555 @@ def _commit_update(clone: Repo, *, exclude_files: Sequence = (), commit_msg: str
     return True
 
 
-def template_update(
-    con: GitHubConnection,
+def _commit_rendered(
+    clone: Repo,
+    project_dir: Path,
     *,
-    forked_repo: GHRepo,
-    original_repo: GHRepo,
-    template_branch_name: str,
-    versioned_branch_name: str,
-    release: TemplateRelease,
-    cruft_log_file: Path,
-    dry_run: bool,
-    template_dir: str,
+    branch: str,
+    files: Mapping[str, str] = MappingProxyType({}),
+    exclude_files: Sequence = (),
+    commit_msg: str,
+    author: Actor,
 ) -> bool:
     """
-    Create or update a template branch in the forked repo.
+    Commit the rendered template on top of `branch` without checking it out.
+
+    The commit is built with git plumbing commands, hashing the files in `project_dir` into the object database.
+    Its tree is the same that `_apply_update` + `_commit_update` would produce: top level `.git*` paths
+    not in the template are kept, and paths matching `exclude_files` keep their state in `branch`.
+
+    Parameters
+    ----------
+    clone
+        target repository, does not need a working tree
+    project_dir
+        the rendered template (not modified)
+    branch
+        branch to commit to
+    files
+        content for paths to use instead of the one in `project_dir`, e.g. a patched `.cruft.json`
+    exclude_files
+        glob patterns of files that will not be updated (see `PathMatcher`)
+    commit_msg
+        commit message
+    author
+        commit author
+
+    Returns
+    -------
+    Whether changes have been made and committed.
+    """
+    log.info(f"Excluding files from patterns: {exclude_files}")
+    exclude = path_matcher(exclude_files)
+    parent = clone.commit(branch)
+    parent_entries = _ls_tree(clone, parent.hexsha)
+    # like `sync_tree`, keep top level `.git*` paths and excluded paths
+    entries = {
+        path: entry
+        for path, entry in parent_entries.items()
+        if path.split("/", 1)[0].startswith(".git") or exclude(path)
+    }
+    entries.update(_hash_tree(clone, project_dir, exclude=lambda p: p in files or exclude(p)))
+    for path, content in files.items():
+        if not exclude(path):
+            entries[path] = ("100644", _git(clone, "hash-object", "-w", "--stdin", stdin=content))
+
+    with TemporaryDirectory() as index_dir:
+        index_info = "".join(f"{mode} {sha}\t{path}\0" for path, (mode, sha) in sorted(entries.items()))
+        index = {"GIT_INDEX_FILE": str(Path(index_dir) / "index")}
+        _git(clone, "update-index", "-z", "--index-info", stdin=index_info, env=index)
+        tree = _git(clone, "write-tree", env=index)
+    if tree == parent.tree.hexsha:
+        log.info("Nothing has changed after excluding files, aborting")
+        return False
+
+    log.info(f"Changes detected. Committing changes to {branch}.")
+    author_env = {"GIT_AUTHOR_NAME": author.name or "", "GIT_AUTHOR_EMAIL": author.email or ""}
+    commit = _git(clone, "commit-tree", "--no-gpg-sign", tree, "-p", parent.hexsha, "-m", commit_msg, env=author_env)
+    clone.git.update_ref(f"refs/heads/{branch}", commit, parent.hexsha)
+    return True
+
+
+def _git(clone: Repo, *args: str, stdin: str | None = None, env: Mapping[str, str] = MappingProxyType({})) -> str:
+    """Run a git command in `clone`’s git directory, with (unlike GitPython) support for passing `stdin`."""
+    from git.exc import GitCommandError
+
+    cmd = ["git", *args]
+    env = {**os.environ, "GIT_DIR": clone.git_dir, **env}
+    proc = run(cmd, input=stdin, env=env, capture_output=True, text=True, check=False)
+    if proc.returncode != 0:
+        raise GitCommandError(cmd, proc.returncode, proc.stderr, proc.stdout)
+    return proc.stdout.strip()
+
+
+def _ls_tree(clone: Repo, treeish: str) -> dict[str, tuple[str, str]]:
+    """Mode and object ID of all files in `treeish`, by path."""
+    entries = {}
+    for line in clone.git.ls_tree("-r", "-z", "--full-tree", treeish).split("\0"):
+        if line:
+            info, path = line.split("\t", 1)
+            mode, _type, sha = info.split()
+            entries[path] = (mode, sha)
+    return entries
+
+
+def _hash_tree(clone: Repo, directory: Path, *, exclude: Callable[[str], bool]) -> dict[str, tuple[str, str]]:
+    """Write all files in `directory` into `clone`’s object database, returning their mode and object ID by path."""
+    src_files, _ = scan_tree(directory)
+    paths = sorted(p for p in (f.as_posix() for f in src_files) if not exclude(p))
+    regular = [p for p in paths if not (directory / p).is_symlink()]
+    entries = {}
+    if regular:
+        shas = _git(clone, "hash-object", "-w", "--stdin-paths", stdin="\n".join(str(directory / p) for p in regular))
+        for path, sha in zip(regular, shas.splitlines(), strict=True):
+            entries[path] = ("100755" if os.access(directory / path, os.X_OK) else "100644", sha)
+    for path in paths:
+        if (directory / path).is_symlink():
+            target = str((directory / path).readlink())
+            entries[path] = ("120000", _git(clone, "hash-object", "-w", "--stdin", stdin=target))
+    return entries
+
+
+def _update_cruft_config(clone_dir: Path, release: TemplateRelease) -> list[str]:
+    """
+    Point the freshly rendered `.cruft.json` to the template release.
+
+    This is necessary since we don't run `cruft create` with `--checkout`
+    and `template_dir` contains the correct version with an additional patch-commit (see `download_template`).
+
+    Returns the `_exclude_on_template_update` patterns of the current version of the template.
+    """
+    with (clone_dir / ".cruft.json").open() as f:
+        tmp_config = json.load(f)
+    exclude_files = _patch_cruft_config(tmp_config, release)
+    with (clone_dir / ".cruft.json").open("w") as f:
+        json.dump(tmp_config, f, indent=2)
+
+    return exclude_files
+
+
+def _get_exclude_patterns(project_dir: Path) -> list[str]:
+    """Get the `_exclude_on_template_update` patterns from the `.cruft.json` of a rendered template."""
+    tmp_config = json.loads((project_dir / ".cruft.json").read_text())
+    return tmp_config["context"]["cookiecutter"].get("_exclude_on_template_update", [])
+
+
+def _patch_cruft_config(tmp_config: dict, release: TemplateRelease) -> list[str]:
+    """Point a rendered cruft config to the template release in-place, see `_update_cruft_config`."""
+    exclude_files = tmp_config["context"]["cookiecutter"].get("_exclude_on_template_update", [])
+
+    # record the context as if the project was rendered interactively (releases before the flag don’t have it)
+    if SYNC_RENDER_VAR in tmp_config["context"]["cookiecutter"]:
+        tmp_config["context"]["cookiecutter"][SYNC_RENDER_VAR] = False
+    tmp_config["commit"] = release.commit
+    tmp_config["checkout"] = release.tag_name
+    tmp_config["template"] = release.template_url
+    tmp_config["context"]["_commit"] = release.commit
+    tmp_config["context"]["_template"] = release.template_url
+    return exclude_files
+
+
+def _write_preview(clone: Repo, branch: str, preview_dir: Path, name: str) -> str:
+    """
+    Write the changes of the last commit on `branch` to `{name}.diffstat` and `{name}.patch` in `preview_dir`.
+
+    The patch can be applied with `git am`.
+
+    Returns
+    -------
+    The summary line of the diffstat, e.g. `3 files changed, 10 insertions(+), 2 deletions(-)`
+    """
+    parent = f"{branch}~1"
+    (preview_dir / f"{name}.diffstat").write_text(clone.git.diff(parent, branch, stat=True) + "\n")
+    (preview_dir / f"{name}.patch").write_text(clone.git.format_patch(parent, branch, stdout=True) + "\n")
+    log.info(f"Wrote preview of the changes to {preview_dir / name}.patch")
+    return clone.git.diff(parent, branch, shortstat=True).strip()
+
+
+def _write_preview_report(path: Path, tag_name: str, results: Mapping[str, str | None]) -> None:
+    """Write a Markdown report with the outcome of every repo of a preview run and the diffstats of their changes."""
+    lines = [
+        f"# Template update preview for {tag_name}",
+        "",
+        "| Repository | Result |",
+        "| --- | --- |",
+        *(f"| {url} | {'failed' if result is None else result} |" for url, result in sorted(results.items())),
+    ]
+    for diffstat in sorted(path.parent.glob("*.diffstat")):
+        name = diffstat.stem
+        lines += ["", f"## {name}", "", f"Patch: `{name}.patch`", "", "```", diffstat.read_text().rstrip(), "```"]
+    path.write_text("\n".join(lines) + "\n")
+    log.info(f"Wrote preview report to {path}")
+
+
+@dataclass
+class RepoJob:
+    """A repository moving through the steps of a `TemplateSync`"""
+
+    repo_url: str
+    pr: TemplateUpdatePR
+    log_dir: InitVar[Path]
+
+    snapshot: RepoSnapshot | None = None
+    """State of the repo from `snapshot_repos`, if available"""
+    completed: Mapping[str, dict[str, Any]] = field(default_factory=dict)
+    """Steps completed in an earlier run according to the `Journal`, with their recorded data"""
+
+    log_file: Path = field(init=False)
+    cruft_log_file: Path = field(init=False)
+    # populated by the individual steps
+    original_repo: GHRepo = field(init=False)
+    cruft_config: CruftConfig = field(init=False)
+    """The cruft config of the original repo’s default branch"""
+    existing_prs: list[PRInfo] = field(init=False)
+    """Current and previous template update PRs"""
+    skipped: bool = field(init=False, default=False)
+    """Whether the `check` step found that the repo needs no update"""
+    fork_future: Future[GHRepo] | None = field(init=False, default=None)
+    """The fork requested from `TemplateSync.forks` by the `check` step"""
+    forked_repo: GHRepo = field(init=False)
+    clone: Repo = field(init=False)
+    exclude_files: list[str] = field(init=False)
+    rendered: Path = field(init=False)
+    """The rendered template (only without `TemplateSync.checkout`)"""
+    cruft_json: str = field(init=False)
+    """The content of `.cruft.json` pointing to the template release (only without `TemplateSync.checkout`)"""
+    updated: bool = field(init=False, default=False)
+    result: str | None = field(init=False, default=None)
+    """A short description of the outcome, for the summary table (`None` if the update failed)"""
+
+    cleanup: contextlib.ExitStack = field(init=False, default_factory=contextlib.ExitStack, repr=False)
+
+    def __post_init__(self, log_dir: Path) -> None:
+        self.log_file = log_dir / f"{self.pr.repo_id}.log"
+        self.cruft_log_file = log_dir / f"{self.pr.template_branch}.log"
+
+
+@dataclass
+class TemplateSync:
+    """
+    Settings shared by all repos of a template sync run, and the steps to update one of them.
 
     Replacement for `cruft update` that implements all the template update logic from scratch.
-    Using this function, conflicts will show up as actual merge conflicts on Github, rather than creating `.rej` files.
+    Using this, conflicts will show up as actual merge conflicts on Github, rather than creating `.rej` files.
 
-    Here's a rough description of the approach:
-    1) fork the repo to update into the scverse-bot namespace
-    2) If no `template-update` branch exists in the fork, create one from the initial commit of the repo
-    3) check out the `template-update` branch
-    3) Remove everything from the template-branch
-    4) Use `cruft create` to instantiate the template into a separate directory
-    5) sync the changes from the separate directory into the `template-branch`
-    6) commit
-    7) check out commit into a version-specific branch used for making the pull request. See #396 for why this is
-       necessary.
+    Here's a rough description of the approach, one step (see `steps`) at a time:
 
-    --> From this commit, we can make a pull-request to the original repo including the latest template-changes.
+    check
+        get the repo’s `.cruft.json` and template update PRs via the API.
+        Skip the repo if it is already at the release or a PR for it already exists (even if it was closed).
+        With `forks`, request the fork right away.
+    fork
+        fork the repo to update into the scverse-bot namespace (with `forks`, wait until the fork is ready)
+    clone
+        clone the fork. If no `template-update` branch exists in the fork,
+        create one from the initial commit of the repo, then check out the `template-update` branch
+    render
+        use `cruft create` to instantiate the template into a separate directory,
+        and replace the content of the `template-update` branch with it
+        (without `checkout`, only render the template)
+    commit
+        commit (without `checkout`, build the commit from the rendered template with git plumbing commands)
+    push
+        check out commit into a version-specific branch used for making the pull request
+        (see #396 for why this is necessary), and push both branches
+    pr
+        From this commit, make a pull-request to the original repo including the latest template-changes.
 
     Parameters
     ----------
     con
         A connection to the github API, authenticated against scverse-bot
-    forked_repo
-        The repo forked in scverse-bot namespace
-    template_branch_name
-        branch name to use for the template in the forked repo
-    versioned_branch_name
-        version-specific branch name (will be created off the template branch)
-    original_repo
-        The original (upstream) repo
     release
-        The release of cookiecutter-scverse to use, together with the commit it points to
-    cruft_log_file
-        Filename to write cruft logs to
+        The release of cookiecutter-scverse to be used, together with the commit it points to
+    template_dir
+        path to the git repository with the cookiecutter template
+    log_dir
+        Path in which cruft logs will be stored
     dry_run
-        If True, do not push changes
-
+        If True, don’t push changes and skip making the actual pull request,
+        but perform all other actions up to this point
+    preview_dir
+        If given, only read from GitHub: don’t create forks, but clone the existing fork or the original repo,
+        and instead of pushing, write the diffstat and patch of the update commit into this directory
+        (see `_write_preview`)
+    cache
+        Persistent cache of the target repos to check out worktrees from instead of cloning
+    render_cache
+        Cache of template renderings to share between repos with the same configuration
+    checkout
+        Check out the `template-update` branch and commit the template from the working tree.
+        If False, build the commit from the rendered template directly, skipping all working tree I/O.
+    pr_cache
+        Template update PRs found or created in earlier runs, to skip looking them up again.
+        Also used with `snapshots`, to know the PRs that the search doesn’t find yet.
+    snapshots
+        State of the repos from `snapshot_repos` by full name, to skip requesting it in the individual steps
+    forks
+        Poller to request forks from in the `check` step, so that their creation overlaps between repos
+    journal
+        Record of the completed steps (see `journaled_steps`).
+        Steps that were completed in the run it was resumed from are skipped.
     """
-    with (
-        TemporaryDirectory() as clone_dir_str,
-        _clone_and_prepare_repo(
-            con,
-            (clone_dir := Path(clone_dir_str)),
-            template_branch_name,
-            forked_repo=forked_repo,
-            original_repo=original_repo,
-        ) as clone,
-    ):
-        default_branch: str = original_repo.default_branch
 
-        cruft_config = _get_cruft_config_from_upstream(clone, default_branch)
-        cookiecutter_config = cruft_config["context"]["cookiecutter"]
+    con: GitHubConnection
+    release: TemplateRelease
+    _: KW_ONLY
+    template_dir: str
+    log_dir: Path
+    dry_run: bool = False
+    preview_dir: Path | None = None
+    cache: MirrorCache | None = None
+    render_cache: RenderCache | None = None
+    checkout: bool = True
+    pr_cache: PRCache | None = None
+    snapshots: Mapping[str, RepoSnapshot] = field(default_factory=dict)
+    forks: ForkPoller | None = None
+    journal: Journal | None = None
+
+    steps: ClassVar[tuple[str, ...]] = ("check", "fork", "clone", "render", "commit", "push", "pr")
+    """The steps to update a repo, in order. Each returns whether the job should continue to the next one."""
+    journaled_steps: ClassVar[tuple[str, ...]] = ("fork", "push", "pr")
+    """The steps recorded in the `journal`. The steps up to them can be skipped when resuming."""
+
+    def job(self, repo_url: str) -> RepoJob:
+        full_name = repo_url.removeprefix("https://github.com/")
+        repo_id = full_name.replace("/", "-")
+        pr = TemplateUpdatePR(self.con, self.release, repo_id)
+        completed = {} if self.journal is None else self.journal.completed(repo_url)
+        return RepoJob(repo_url, pr, self.log_dir, snapshot=self.snapshots.get(full_name), completed=completed)
+
+    def run_step(self, name: str, job: RepoJob) -> bool:
+        """Run a step, additionally logging everything it does into the job’s log file."""
+        with log_to_file(job.log_file):
+            if self._resume(name, job):
+                log.info(f"Skipping {name} step, completed in an earlier run")
+                return True
+            try:
+                with span(name, repo=job.pr.repo_id):
+                    proceed = getattr(self, name)(job)
+            except Exception:
+                log.exception(f"Error while updating {job.repo_url} ({name})")
+                raise
+            if self.journal is not None and name in self.journaled_steps:
+                self.journal.record(job.repo_url, name, **self._journal_data(name, job))
+            return proceed
+
+    def _journal_data(self, name: str, job: RepoJob) -> dict[str, Any]:
+        """The data needed to skip step `name` when resuming."""
+        match name:
+            case "fork":
+                return {"fork": job.forked_repo.full_name}
+            case "push":
+                return {"updated": job.updated}
+            case "pr":
+                return {"result": job.result}
+        raise ValueError(name)
+
+    def _resume(self, name: str, job: RepoJob) -> bool:
+        """Restore the outcome of step `name` from an earlier run, and return whether that was possible."""
+        done = job.completed
+        if name == "fork" and "fork" in done:
+            job.forked_repo = self.con.gh.get_repo(done["fork"]["fork"])
+            return True
+        # the pushed branches contain everything that cloning, rendering, and committing produced
+        if name in {"clone", "render", "commit", "push"} and "push" in done:
+            job.updated = done["push"]["updated"]
+            return True
+        return False
+
+    def stages(self, workers: Mapping[str, int]) -> list[Stage[RepoJob]]:
+        """Pipeline stages for all steps, with `workers[step]` worker threads each."""
+        return [Stage(name, partial(self.run_step, name), workers[name]) for name in self.steps]
+
+    def check(self, job: RepoJob) -> bool:
+        log.info(f"Working on template update for {job.pr.repo_id}")
+        if job.snapshot is None:
+            job.original_repo = self.con.gh.get_repo(job.repo_url.removeprefix("https://github.com/"))
+            job.cruft_config = _get_cruft_config_from_api(job.original_repo)
+            job.existing_prs = job.pr.find_existing(job.original_repo, self.pr_cache)
+        else:
+            job.original_repo = job.snapshot.repo
+            if job.snapshot.cruft_json is None:
+                msg = "No .cruft.json found in repository"
+                raise FileNotFoundError(msg)
+            job.cruft_config = cast("CruftConfig", json.loads(job.snapshot.cruft_json))
+            prs = job.snapshot.prs
+            job.existing_prs = prs if self.pr_cache is None else self.pr_cache.update(job.pr.repo_id, prs)
+
+        reason = None
+        config = job.cruft_config
+        if self.release.commit == config.get("commit") or self.release.tag_name == config.get("checkout"):
+            reason = f"already at {self.release.tag_name}"
+        elif old_pr := next((p for p in job.existing_prs if job.pr.matches_current_version(p)), None):
+            reason = f"PR #{old_pr['number']} already exists"
+        if reason is None:
+            has_fork = "fork" in job.completed or (job.snapshot is not None and job.snapshot.fork is not None)
+            if self.forks is not None and not has_fork:
+                job.fork_future = self.forks.request(job.original_repo)
+            return True
+        log.info(f"Nothing to do: {reason}")
+        job.result = f"skipped: {reason}"
+        job.skipped = True
+        return False
+
+    def fork(self, job: RepoJob) -> bool:
+        if job.snapshot is not None and job.snapshot.fork is not None:
+            log.info(f"Using existing fork {job.snapshot.fork.full_name}")
+            job.forked_repo = job.snapshot.fork
+        elif job.fork_future is not None:
+            log.info(f"Waiting for fork of {job.original_repo.full_name}")
+            # the poller times out forks that aren’t ready, this guards against it getting stuck
+            job.forked_repo = job.fork_future.result(timeout=2 * WAIT_FOR_FORK)
+        elif self.preview_dir is not None:
+            job.forked_repo = self._existing_fork(job.original_repo, known=job.snapshot is not None)
+        else:
+            job.forked_repo = get_fork(self.con, job.original_repo)
+        return True
+
+    def _existing_fork(self, repo: GHRepo, *, known: bool) -> GHRepo:
+        """
+        Look up the fork of `repo` without creating it, falling back to `repo` itself.
+
+        A new fork would have the same branches as `repo`, so the template update branch is created the same way.
+        If `known`, the snapshot already showed that there’s no fork.
+        """
+        from github import UnknownObjectException
+
+        if not known:
+            try:
+                fork = self.con.gh.get_repo(f"{self.con.login}/{repo.name}")
+            except UnknownObjectException:
+                pass
+            else:
+                if fork.fork and fork.parent.full_name == repo.full_name:
+                    log.info(f"Using existing fork {fork.full_name}")
+                    return fork
+        log.info(f"No fork of {repo.full_name}, previewing the update based on the original repo")
+        return repo
+
+    def clone(self, job: RepoJob) -> bool:
+        clone_dir = Path(job.cleanup.enter_context(TemporaryDirectory()))
+        job.clone = job.cleanup.enter_context(
+            _clone_and_prepare_repo(
+                self.con,
+                clone_dir,
+                job.pr.template_branch,
+                forked_repo=job.forked_repo,
+                original_repo=job.original_repo,
+                cache=self.cache,
+                checkout=self.checkout,
+                root_commit=job.snapshot and job.snapshot.root_commit,
+            )
+        )
+        return True
+
+    def render(self, job: RepoJob) -> bool:
+        cruft_config = job.cruft_config
+        if not self.checkout:
+            job.rendered = _render_update(
+                cruft_config["context"]["cookiecutter"],
+                cruft_log_file=job.cruft_log_file,
+                template_dir=self.template_dir,
+                render_cache=self.render_cache,
+                cleanup=job.cleanup,
+            )
+            tmp_config = json.loads((job.rendered / ".cruft.json").read_text())
+            job.exclude_files = _patch_cruft_config(tmp_config, self.release)
+            job.cruft_json = json.dumps(tmp_config, indent=2)
+            return True
         _apply_update(
-            clone,
-            cruft_log_file=cruft_log_file,
-            cookiecutter_config=cookiecutter_config,
-            template_dir=template_dir,
+            job.clone,
+            cruft_log_file=job.cruft_log_file,
+            cookiecutter_config=cruft_config["context"]["cookiecutter"],
+            template_dir=self.template_dir,
+            render_cache=self.render_cache,
         )
-
-        # Load .cruft.json file of the current version of the template (includes `_exclude_on_template_update` key)
-        with (clone_dir / ".cruft.json").open() as f:
-            tmp_config = json.load(f)
-            exclude_files = tmp_config["context"]["cookiecutter"].get("_exclude_on_template_update", [])
-
-        # Update .cruft.json with current tag and commit hash.
-        # This is necessary since we don't run `cruft create` with `--checkout`
-        # and `template_dir` contains the correct version with an additional patch-commit (see `download_template`).
-        tmp_config["commit"] = release.commit
-        tmp_config["checkout"] = release.tag_name
-        tmp_config["template"] = release.template_url
-        tmp_config["context"]["_commit"] = release.commit
-        tmp_config["context"]["_template"] = release.template_url
-        with (clone_dir / ".cruft.json").open("w") as f:
-            json.dump(tmp_config, f, indent=2)
-
-        if (
-            updated := _commit_update(
-                clone,
-                exclude_files=exclude_files,
-                commit_msg=f"Automated template update to {release.tag_name}",
-                commit_author=f"{con.sig.name} <{con.sig.email}>",
+        job.exclude_files = _update_cruft_config(Path(job.clone.working_dir), self.release)
+        return True
+
+    def commit(self, job: RepoJob) -> bool:
+        if not self.checkout:
+            job.updated = _commit_rendered(
+                job.clone,
+                job.rendered,
+                branch=job.pr.template_branch,
+                files={".cruft.json": job.cruft_json},
+                exclude_files=job.exclude_files,
+                commit_msg=f"Automated template update to {self.release.tag_name}",
+                author=self.con.sig,
             )
-        ) and not dry_run:
-            clone.git.switch(versioned_branch_name, template_branch_name, C=True)
-            clone.git.push("origin", template_branch_name)
-            clone.git.push("origin", versioned_branch_name)
-
-        return updated
+            return True
+        job.updated = _commit_update(
+            job.clone,
+            exclude_files=job.exclude_files,
+            commit_msg=f"Automated template update to {self.release.tag_name}",
+            commit_author=f"{self.con.sig.name} <{self.con.sig.email}>",
+        )
+        return True
+
+    def push(self, job: RepoJob) -> bool:
+        if self.preview_dir is not None:
+            if job.updated:
+                stat = _write_preview(job.clone, job.pr.template_branch, self.preview_dir, job.pr.repo_id)
+                job.result = f"preview: {stat}"
+        elif job.updated and not self.dry_run:
+            job.clone.create_head(job.pr.pr_branch, job.pr.template_branch, force=True)
+            with span("git push", "git"):
+                job.clone.git.push("origin", job.pr.template_branch)
+                job.clone.git.push("origin", job.pr.pr_branch)
+        # the clone is not needed anymore, free up the disk space early
+        job.cleanup.close()
+        return True
+
+    def pr(self, job: RepoJob) -> bool:
+        pr, original_repo = job.pr, job.original_repo
+        if self.preview_dir is not None:
+            log.info("Skipping PR because in preview mode")
+            job.result = job.result or "preview: no changes"
+            return False
+        if self.dry_run:
+            log.info("Skipping PR because in dry-run mode")
+            job.result = "dry run: branch updated" if job.updated else "dry run: no changes"
+            return False
+
+        existing = job.existing_prs
+        # check against all PRs, including closed ones -- if one already exists for the current version,
+        # and the developer closed it, we do not want to reopen it.
+        old_pr = next((p for p in existing if pr.matches_current_version(p)), None)
+        # the search index lags behind, so confirm with an exact lookup before creating or closing any PR
+        if old_pr is None and (old_pr := pr.find_current(original_repo)) is not None:
+            existing.append(old_pr)
+            if self.pr_cache is not None:
+                self.pr_cache.save(pr.repo_id, existing)
+        if old_pr is not None:
+            log.info(
+                f"PR already exists: #{old_pr['number']} with branch name `{old_pr['head_ref']}`. Skipping PR creation."
+            )
+            job.result = f"PR #{old_pr['number']} already exists"
+            return False
+
+        # check if there's a PR open for an earlier version -- if yes, close it (in favor of the new one to be created)
+        if old_pr := next((p for p in existing if p["state"] == "open" and pr.matches_prefix(p)), None):
+            log.info(f"Closing old PR #{old_pr['number']} with branch name `{old_pr['head_ref']}`.")
+            original_repo.get_pull(old_pr["number"]).edit(state="closed")
+            old_pr["state"] = "closed"
+
+        log.info(f"Creating PR of {pr.namespaced_head} against {original_repo.default_branch}")
+        new_pr = original_repo.create_pull(
+            title=pr.title,
+            body=pr.body,
+            base=original_repo.default_branch,
+            head=pr.namespaced_head,
+            maintainer_can_modify=True,
+        )
+        log.info(f"Created PR #{new_pr.number} with branch name `{new_pr.head.ref}`.")
+        if self.pr_cache is not None:
+            # the search index lags behind, so remember the new PR for the next run
+            existing.append(PRInfo(number=new_pr.number, head_ref=pr.pr_branch, state="open", author=self.con.login))
+            self.pr_cache.save(pr.repo_id, existing)
+        job.result = f"created PR #{new_pr.number}"
+        return False
 
 
 def make_pr(
@@ -566,9 +1149,9 @@ def make_pr(
     log_dir: Path,
     dry_run: bool = False,
     template_dir: str,
-) -> None:
+) -> str | None:
     """
-    Make a pull request with the template update to the original repo
+    Make a pull request with the template update to the original repo, running all steps of `TemplateSync` in order.
 
     Parameters
     ----------
@@ -584,62 +1167,102 @@ def make_pr(
         If True, skip making the actual pull request but perform all other actions up to this point
     template_dir
         path to the git repository with the cookiecutter template
+
+    Returns
+    -------
+    A short description of the outcome, for the summary table
     """
-    repo_id = repo_url.replace("https://github.com/", "").replace("/", "-")
-    log.info(f"Working on template update for {repo_id}")
-
-    pr = TemplateUpdatePR(con, release, repo_id)
-    # create fork, populate branch, do PR from it
-    original_repo = con.gh.get_repo(repo_url.removeprefix("https://github.com/"))
-
-    forked_repo = get_fork(con, original_repo)
-
-    template_update(
-        con,
-        forked_repo=forked_repo,
-        original_repo=original_repo,
-        template_branch_name=pr.template_branch,
-        versioned_branch_name=pr.pr_branch,
-        release=release,
-        cruft_log_file=log_dir / f"{pr.template_branch}.log",
-        dry_run=dry_run,
-        template_dir=template_dir,
-    )
-    if dry_run:
-        log.info("Skipping PR because in dry-run mode")
-        return
+    sync = TemplateSync(con, release, template_dir=template_dir, log_dir=log_dir, dry_run=dry_run)
+    job = sync.job(repo_url)
+    with job.cleanup:
+        for name in sync.steps:
+            if not sync.run_step(name, job):
+                break
+    return job.result
+
+
+def _parse_stage_jobs(specs: Iterable[str], default: int) -> dict[str, int]:
+    """Parse `step=N` specs into a number of workers per step, using `default` for unspecified steps."""
+    workers = dict.fromkeys(TemplateSync.steps, default)
+    for spec in specs:
+        name, sep, n = spec.partition("=")
+        if not sep or name not in workers or not n.isdigit() or int(n) < 1:
+            msg = f"Invalid stage limit {spec!r}, expected `<step>=<n>` with step one of {', '.join(workers)}"
+            raise ValueError(msg)
+        workers[name] = int(n)
+    return workers
+
+
+def _report_stats(con: GitHubConnection, render_cache: RenderCache, trace_file: Path) -> None:
+    """Log how well the caches worked and how long the run waited for GitHub, and export and print the timings."""
+    from rich.console import Console
+
+    log.info(f"Render cache: {render_cache.hits} hits, {render_cache.misses} misses")
+    log.info(f"GitHub API requests were throttled for {con.limiter.throttled:.1f}s in total")
+    for name, stats in retry_stats().items():
+        log.info(f"Retries of {name}: {stats}")
+    tracer.export(trace_file)
+    log.info(f"Wrote trace of the run to {trace_file}")
+    Console().print(tracer.summary())
+
+
+def _clear_dir(path: Path) -> Path:
+    """Create an empty directory at `path`, removing the content of an existing one."""
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir()
+    return path
+
+
+def _select_repos(
+    con: GitHubConnection, repo_urls: Iterable[str] | None, *, all_repos: bool, shard: Shard | None
+) -> list[str]:
+    """The URLs of the repos to update, either `repo_urls` or all that use the template, restricted to `shard`."""
+    if all_repos:
+        repo_urls = get_repo_urls(con.gh)
+    if repo_urls is None:
+        msg = "Need to either specify `--all` or one or more repo URLs."
+        raise ValueError(msg)
+    if shard is None:
+        return list(repo_urls)
+    repo_urls = list(repo_urls)
+    selected = [url for url in repo_urls if url.removeprefix("https://github.com/").replace("/", "-") in shard]
+    log.info(f"Shard {shard} contains {len(selected)} of {len(repo_urls)} repos")
+    return selected
 
-    # check against all PRs, including closed ones -- if one already exists for the current version,
-    # and the developer closed it, we do not want to reopen it.
-    if old_pr := next((p for p in original_repo.get_pulls("all") if pr.matches_current_version(p)), None):
-        log.info(f"PR already exists: #{old_pr.number} with branch name `{old_pr.head.ref}`. Skipping PR creation.")
-        return
 
-    # check if there's a PR open for an earlier version -- if yes, we close it (in favor of the new one to be created)
-    if old_pr := next((p for p in original_repo.get_pulls("open") if pr.matches_prefix(p)), None):
-        log.info(f"Closing old PR #{old_pr.number} with branch name `{old_pr.head.ref}`.")
-        old_pr.edit(state="closed")
-
-    log.info(f"Creating PR of {pr.namespaced_head} against {original_repo.default_branch}")
-    new_pr = original_repo.create_pull(
-        title=pr.title,
-        body=pr.body,
-        base=original_repo.default_branch,
-        head=pr.namespaced_head,
-        maintainer_can_modify=True,
-    )
-    log.info(f"Created PR #{new_pr.number} with branch name `{new_pr.head.ref}`.")
+def _print_results(results: Mapping[str, str | None]) -> None:
+    """Print one table with the outcome for every repo (`None` meaning it failed)."""
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table("Repository", "Result", title=f"Template update results ({len(results)} repos)")
+    for repo_url, result in sorted(results.items()):
+        table.add_row(repo_url, "[red]failed[/red]" if result is None else result)
+    Console().print(table)
 
 
-cli = App()
+def _save_results(path: Path, tag_name: str, results: Mapping[str, str | None]) -> None:
+    """Save the outcome for every repo, to be combined with those of other shards by `merge_logs`."""
+    path.write_text(json.dumps({"tag_name": tag_name, "results": results}, indent=2) + "\n")
+
+
+RESULTS_FILE = "results.json"
 
 
 @contextlib.contextmanager
-def download_template(con: GitHubConnection, template_url: str, tag_name: str) -> Generator[str, None, None]:
+def download_template(
+    con: GitHubConnection,
+    template_url: str,
+    tag_name: str,
+    *,
+    commit: str | None = None,
+    cache_dir: Path | None = None,
+) -> Generator[str, None, None]:
     """
-    Clone the template repository into a temporary directory and check out a tag name.
+    Fetch a tag of the template repository into a temporary directory and check it out.
 
     This avoids repeated downloads of the template.
+    Only the tagged commit is fetched, not the history of the template.
 
     Patches cookiecutter.json config, such that lists are replaced with empty strings.
     This avoids issues with template sync in cases users specified options that are outside the (currently)
@@ -651,16 +1274,58 @@ def download_template(con: GitHubConnection, template_url: str, tag_name: str) -
         GitHub connection used to authenticate the clone URL
     template_url
         URL of the template repository to clone
+    tag_name
+        tag to check out
+    commit
+        The commit `tag_name` points to. If given, it is checked that the tag still points to it.
+    cache_dir
+        If given (together with `commit`), keep the patched checkout in this directory,
+        keyed by tag and commit, and reuse it in later runs instead of fetching the template again.
 
     Yields
     ------
     str
-        Path to the temporary directory containing the cloned repository
+        Path to the directory containing the patched checkout. It must not be modified.
     """
-    with TemporaryDirectory() as td:
-        clone = Repo.clone_from(con.auth(template_url), td, filter="blob:none")
-        clone.git.checkout(tag_name)
-        with (Path(td) / "cookiecutter.json").open() as f:
+    if cache_dir is None or commit is None:
+        with TemporaryDirectory() as td:
+            _fetch_template(con.auth(template_url), Path(td), tag_name, commit=commit)
+            yield td
+        return
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cached = cache_dir / f"{tag_name.replace('/', '-')}-{commit}"
+    if cached.is_dir():
+        log.info(f"Using cached template checkout {cached}")
+        os.utime(cached)  # mark as recently used
+    else:
+        # populate atomically, so an interrupted or concurrent run never sees a partial checkout
+        with TemporaryDirectory(dir=cache_dir, prefix=".tmp-") as td:
+            _fetch_template(con.auth(template_url), Path(td), tag_name, commit=commit)
+            try:
+                Path(td).rename(cached)
+            except OSError:
+                if not cached.is_dir():  # otherwise, another run was faster
+                    raise
+        # keep the most recently used checkouts, e.g. for a rerun of the previous release
+        for old in sorted(cache_dir.glob("[!.]*"), key=lambda p: p.stat().st_mtime, reverse=True)[3:]:
+            shutil.rmtree(old)
+    yield str(cached)
+
+
+def _fetch_template(url: str, path: Path, tag_name: str, *, commit: str | None) -> None:
+    """Fetch only the tagged commit of the template into `path`, check it out, and patch `cookiecutter.json`."""
+    from git.repo import Repo
+
+    log.info(f"Fetching {tag_name} of the template into {path}")
+    with Repo.init(path) as repo:
+        repo.git.fetch("--depth=1", url, f"refs/tags/{tag_name}:refs/tags/{tag_name}")
+        resolved = repo.git.rev_parse(f"{tag_name}^{{commit}}")
+        if commit is not None and resolved != commit:
+            msg = f"Tag {tag_name} points to {resolved}, not to the release commit {commit}"
+            raise ValueError(msg)
+        repo.git.checkout(tag_name)
+        with (path / "cookiecutter.json").open() as f:
             cookiecutter_config = json.load(f)
 
         # Replace list values with an empty string to allow arbitrary values passed in via --extra-context-file,
@@ -669,16 +1334,13 @@ def download_template(con: GitHubConnection, template_url: str, tag_name: str) -
             k: "" if isinstance(v, list) and k not in COOKIECUTTER_VARS_OVERRIDE_FROM_TEMPLATE else v
             for k, v in cookiecutter_config.items()
         }
-        with (Path(td) / "cookiecutter.json").open("w") as f:
+        with (path / "cookiecutter.json").open("w") as f:
             json.dump(cookiecutter_config_patched, f)
 
-        clone.git.add("cookiecutter.json")
-        clone.git.commit(message="Patch cookiecutter.json")
-
-        yield td
+        repo.git.add("cookiecutter.json")
+        repo.git.commit(message="Patch cookiecutter.json")
 
 
-@cli.default
 def main(
     tag_name: str,
     repo_urls: Iterable[str] | None = None,
@@ -686,7 +1348,18 @@ def main(
     all_repos: bool = False,
     log_dir: Path = Path("cruft_logs"),
     dry_run: bool = False,
+    preview: bool = False,
     template_url: str = "https://github.com/scverse/cookiecutter-scverse",
+    jobs: int = 1,
+    stage_jobs: list[str] | None = None,
+    cache_dir: Path | None = None,
+    cache_max_gb: float = 20,
+    render_in_process: bool = True,
+    checkout: bool = True,
+    preflight: bool = True,
+    fork_ahead: bool = False,
+    resume: bool = False,
+    shard: str | None = None,
 ) -> None:
     """
     Make PRs to GitHub repos.
@@ -701,44 +1374,226 @@ def main(
     all
         With this flag, get the list of all repos that use the template from https://github.com/scverse/ecosystem-packages/blob/main/template-repos.yml.
     log_dir
-        Directory to which cruft logs are written
+        Directory to which cruft logs, the run journal, and a timing trace (`trace.json`) are written
     dry_run
         Skip making actual pull requests. All other actions up to this point are performed
         (forking the repo, updating the template branch etc.).
+        Like `preview`, doesn’t touch the journal of earlier runs, so it can’t be combined with `resume`.
+    preview
+        Only preview the updates locally, without creating forks or pushing anything,
+        so a read-only `GITHUB_TOKEN` suffices (it can’t be omitted, as GitHub’s GraphQL API requires authentication).
+        The existing fork (or else the original repo) is cloned, and the template rendered and committed as usual.
+        The diffstat and patch of every update, and a consolidated `report.md`, are written to `preview` in `log_dir`.
+        Doesn’t touch the journal of earlier runs, so it can’t be combined with `resume`.
+    jobs
+        Number of repos each step (see `stage_jobs`) works on concurrently.
+        Each repo gets its own clone directory and log file, the template checkout is shared.
+    stage_jobs
+        Override `jobs` for individual steps, e.g. `--stage-jobs fork=16 --stage-jobs render=4`.
+        The steps are check, fork, clone, render, commit, push and pr.
+        Repos are passed from one step to the next, so e.g. forks for later repos are created
+        while earlier ones are being rendered or pushed.
+    cache_dir
+        Keep a bare repository per target repo in this directory across runs,
+        so only new objects need to be fetched instead of cloning every repo from scratch.
+        Also remembers the template update PRs of every repo, and the checkouts of recent template releases.
+    cache_max_gb
+        After the run, evict the least recently used repos from `cache_dir` until it is smaller than this.
+    render_in_process
+        Render the template in-process, reusing one Jinja environment for all repos.
+        With `--no-render-in-process`, run `cruft create` in a subprocess for every repo instead.
+    checkout
+        Check out the template update branch and commit the rendered template from the working tree.
+        With `--no-checkout`, build the commit from the rendered template using git plumbing commands,
+        which skips all working tree I/O.
+    preflight
+        Before starting, get the state of all repos (default branch, fork, `.cruft.json`, PRs)
+        in a few batched GraphQL queries instead of several requests per repo.
+    fork_ahead
+        Request the forks of all repos that need an update right away (in the check step),
+        and wait for all of them in one background poller, so the time GitHub takes to create them overlaps.
+        The fork step then only waits for a repo’s fork, so it gets one worker per repo.
+    resume
+        Continue an interrupted run for the same release: skip repos that are done and continue the others
+        after the last fork, push, or PR step they completed, as recorded in `journal.jsonl` in `log_dir`.
+        Without this, the journal is started from scratch.
+    shard
+        Only update part `i` of `n` of the repos, e.g. `--shard 2/4`, to spread a run over several runners.
+        Repos are assigned to shards by a hash of their name, so all runners agree on the assignment.
+        Combine the `log_dir`s of all shards with `merge-cruft-logs`.
     """
     setup_logging()
     log_dir.mkdir(exist_ok=True, parents=True)
 
-    token = os.environ["GITHUB_TOKEN"]
-    con = GitHubConnection("scverse-bot", token, email="108668866+scverse-bot@users.noreply.github.com")
-
-    if all_repos:
-        repo_urls = get_repo_urls(con.gh)
+    con = GitHubConnection(
+        "scverse-bot",
+        os.environ["GITHUB_TOKEN"],
+        email="108668866+scverse-bot@users.noreply.github.com",
+        # set in GitHub Actions
+        base_url=os.environ.get("GITHUB_API_URL", GITHUB_API_URL),
+    )
 
-    if repo_urls is None:
-        msg = "Need to either specify `--all` or one or more repo URLs."
+    repo_urls = _select_repos(con, repo_urls, all_repos=all_repos, shard=None if shard is None else Shard.parse(shard))
+    if (preview or dry_run) and resume:
+        msg = f"A {'preview' if preview else 'dry'} run can’t be resumed."
         raise ValueError(msg)
 
+    preview_dir = _clear_dir(log_dir / "preview") if preview else None
+    fork_ahead = fork_ahead and not preview  # previews don’t create forks
+    # a journal of these would make a later real run skip the repos they went through
+    journal = None if preview or dry_run else Journal(log_dir / "journal.jsonl", tag_name, resume=resume)
+    # repos that are done keep the result of the earlier run
+    results = {} if journal is None else {url: res for url, res in journal.finished().items() if url in repo_urls}
+    repo_urls = [url for url in repo_urls if url not in results]
+    workers = _parse_stage_jobs(stage_jobs or (), jobs)
+    if fork_ahead:
+        # pass repos on to cloning in the order their forks become ready
+        workers["fork"] = max(workers["fork"], len(repo_urls))
+    cache = None if cache_dir is None else MirrorCache(cache_dir, max_size=int(cache_max_gb * 1e9))
+    pr_cache = None if cache_dir is None else PRCache(cache_dir / "prs")
     release = get_template_release(con.gh, template_url, tag_name)
-    failed = 0
-    with download_template(con, template_url, tag_name) as template_dir:
-        for repo_url in repo_urls:
-            try:
-                make_pr(
-                    con,
-                    release,
-                    repo_url,
-                    log_dir=log_dir,
-                    dry_run=dry_run,
-                    template_dir=template_dir,
-                )
-            except Exception as e:
-                failed += 1
-                log.error(f"Error while updating {repo_url}")
-                log.exception(e)
+    snapshots = (
+        snapshot_repos(
+            con.gh,
+            [url.removeprefix("https://github.com/") for url in repo_urls],
+            login=con.login,
+            head_prefix=TemplateUpdatePR.branch_prefix,
+        )
+        if preflight
+        else {}
+    )
+    skipped: list[str] = []
+
+    def on_error(job: RepoJob, _stage: Stage[RepoJob], _e: Exception) -> None:
+        job.result = None  # already logged in `TemplateSync.run_step`
+
+    def on_finish(job: RepoJob) -> None:
+        job.cleanup.close()
+        results[job.repo_url] = job.result
+        if job.skipped:
+            skipped.append(job.repo_url)
 
+    with (
+        download_template(
+            con,
+            template_url,
+            tag_name,
+            commit=release.commit,
+            cache_dir=None if cache_dir is None else cache_dir / "templates",
+        ) as template_dir,
+        TemporaryDirectory() as render_dir,
+        ForkPoller(con.gh) if fork_ahead else contextlib.nullcontext() as forks,
+    ):
+        render = (
+            TemplateRenderer(Path(template_dir))
+            if render_in_process
+            else partial(render_template, template_dir=template_dir)
+        )
+        render_cache = RenderCache(Path(render_dir), render)
+        sync = TemplateSync(
+            con,
+            release,
+            template_dir=template_dir,
+            log_dir=log_dir,
+            dry_run=dry_run,
+            preview_dir=preview_dir,
+            cache=cache,
+            render_cache=render_cache,
+            checkout=checkout,
+            pr_cache=pr_cache,
+            snapshots=snapshots,
+            forks=forks,
+            journal=journal,
+        )
+        pipeline = Pipeline(sync.stages(workers), on_error=on_error, on_finish=on_finish)
+        pipeline.run(map(sync.job, repo_urls))
+    log.info(f"Skipped {len(skipped)} of {len(results)} repos that needed no update")
+
+    if cache is not None:
+        cache.evict()
+
+    _report_stats(con, render_cache, log_dir / "trace.json")
+    _print_results(results)
+    _save_results(log_dir / RESULTS_FILE, tag_name, results)
+    if preview_dir is not None:
+        _write_preview_report(preview_dir / "report.md", tag_name, results)
+    failed = sum(result is None for result in results.values())
     sys.exit(failed > 0)
 
 
+def merge_logs(shard_log_dirs: list[Path], /, *, output: Path = Path("cruft_logs")) -> None:
+    """
+    Combine the log directories of the shards of a run (see `send-cruft-prs --shard`) into one.
+
+    Prints the results of all repos, and exits with an error if any repo failed or any shard didn’t finish.
+
+    Parameters
+    ----------
+    shard_log_dirs
+        The `log_dir` of every shard
+    output
+        Directory to write the combined logs to. The repo logs and previews are copied,
+        journals and results are merged, and the traces are combined with one process per shard.
+    """
+    setup_logging()
+    output.mkdir(exist_ok=True, parents=True)
+    results: dict[str, str | None] = {}
+    tag_names: set[str] = set()
+    events: list[dict[str, Any]] = []
+    unfinished = 0
+    with (output / "journal.jsonl").open("w") as journal:
+        for pid, shard_dir in enumerate(shard_log_dirs, 1):
+            try:
+                shard_results = json.loads((shard_dir / RESULTS_FILE).read_text())
+            except FileNotFoundError:
+                log.error(f"Shard {shard_dir} has no {RESULTS_FILE}, it didn’t finish")
+                unfinished += 1
+            else:
+                tag_names.add(shard_results["tag_name"])
+                results.update(shard_results["results"])
+            events += _copy_shard_logs(shard_dir, output, journal=journal, pid=pid)
+    (output / "trace.json").write_text(json.dumps({"traceEvents": events}))
+
+    _print_results(results)
+    _save_results(output / RESULTS_FILE, ", ".join(sorted(tag_names)), results)
+    if (output / "preview").is_dir():
+        _write_preview_report(output / "preview" / "report.md", ", ".join(sorted(tag_names)), results)
+    failed = sum(result is None for result in results.values())
+    log.info(f"{len(results)} repos in {len(shard_log_dirs)} shards: {failed} failed, {unfinished} shards unfinished")
+    sys.exit(failed > 0 or unfinished > 0)
+
+
+def _copy_shard_logs(shard_dir: Path, output: Path, *, journal: IO[str], pid: int) -> list[dict[str, Any]]:
+    """Copy the logs of a shard into `output`, appending its journal to `journal`, and return its trace events."""
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"shard {shard_dir.name}"}}]
+    if not shard_dir.is_dir():  # the shard didn’t start
+        return events
+    for path in shard_dir.iterdir():
+        match path.name:
+            case "journal.jsonl":
+                journal.write(path.read_text())
+            case "trace.json":
+                events += [{**e, "pid": pid} for e in json.loads(path.read_text())["traceEvents"]]
+            case "preview":
+                shutil.copytree(path, output / path.name, dirs_exist_ok=True)
+            case name if name != RESULTS_FILE:
+                shutil.copy2(path, output / path.name)
+    return events
+
+
+def cli() -> None:
+    """Entry point of `send-cruft-prs`."""
+    from cyclopts import App
+
+    App(default_command=main)()
+
+
+def merge_cli() -> None:
+    """Entry point of `merge-cruft-logs`."""
+    from cyclopts import App
+
+    App(default_command=merge_logs)()
+
+
 if __name__ == "__main__":
     cli()
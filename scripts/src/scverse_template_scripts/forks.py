@@ -0,0 +1,144 @@
+"""Creation of the forks for all target repositories at the start of a run.
+
+GitHub creates forks asynchronously, which can take up to 5 minutes.
+Instead of waiting for each fork right before cloning it, `ForkPoller` requests forks as soon as a repo
+is known to need an update, and watches all pending forks in a single background thread,
+with one GraphQL query per poll. The waiting times of all repos overlap that way instead of adding up.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from itertools import batched
+from queue import Empty, Queue
+from typing import TYPE_CHECKING
+
+from ._log import log
+from .preflight import graphql
+
+if TYPE_CHECKING:
+    from typing import Any, Self
+
+    from github import Github
+    from github.Repository import Repository
+
+
+@dataclass
+class _PendingFork:
+    fork: Repository
+    future: Future[Repository]
+    deadline: float
+    empty: bool
+    """The original repository has no commits, so the fork won’t get a default branch"""
+
+
+@dataclass
+class ForkPoller:
+    """
+    Background thread that creates forks and resolves them once they are ready, to be used as a context manager.
+
+    Parameters
+    ----------
+    gh
+        GitHub API client, authenticated as the user who should own the forks
+    interval
+        seconds between polls of the pending forks
+    timeout
+        seconds after which a fork that isn’t ready fails with a `TimeoutError`
+    batch_size
+        number of forks to check per query
+    """
+
+    gh: Github
+    interval: float = 2
+    timeout: float = 5 * 60
+    batch_size: int = 50
+
+    _requests: Queue[tuple[Repository, Future[Repository]] | None] = field(default_factory=Queue, init=False)
+    _thread: threading.Thread = field(init=False)
+
+    def request(self, repo: Repository) -> Future[Repository]:
+        """Fork `repo` (or reuse the existing fork). The returned future resolves to the fork once it’s ready."""
+        future: Future[Repository] = Future()
+        self._requests.put((repo, future))
+        return future
+
+    def __enter__(self) -> Self:
+        self._thread = threading.Thread(target=self._run, name="fork-poller", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self._requests.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        pending: list[_PendingFork] = []
+        try:
+            self._serve(pending)
+        except Exception as e:
+            # fail the forks that are waited for instead of leaving them pending forever
+            log.exception("Fork poller failed")
+            for p in pending:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            while (item := self._requests.get()) is not None:
+                item[1].set_exception(e)
+        else:
+            for p in pending:
+                p.future.cancel()
+
+    def _serve(self, pending: list[_PendingFork]) -> None:
+        """Handle requests and poll the `pending` forks (modified in place) until `None` is requested."""
+        next_poll = time.monotonic()
+        while True:
+            if pending and time.monotonic() >= next_poll:
+                pending[:] = self._poll(pending)
+                next_poll = time.monotonic() + self.interval
+            try:
+                # handle new requests while waiting for the next poll
+                item = self._requests.get(timeout=max(next_poll - time.monotonic(), 0) if pending else None)
+            except Empty:
+                continue
+            if item is None:
+                return
+            repo, future = item
+            try:
+                log.info(f"Creating fork for {repo.url}")
+                fork = repo.create_fork()
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            if not pending:
+                next_poll = time.monotonic() + self.interval
+            empty = repo.default_branch is None
+            pending.append(_PendingFork(fork, future, deadline=time.monotonic() + self.timeout, empty=empty))
+
+    def _poll(self, pending: list[_PendingFork]) -> list[_PendingFork]:
+        """Resolve the futures of forks that are ready or timed out, and return the others."""
+        still_pending: list[_PendingFork] = []
+        for batch in batched(pending, self.batch_size):
+            variables: dict[str, Any] = {}
+            fields = []
+            for i, p in enumerate(batch):
+                variables[f"owner{i}"], variables[f"name{i}"] = p.fork.full_name.split("/", 1)
+                fields.append(f"r{i}: repository(owner: $owner{i}, name: $name{i}) {{ defaultBranchRef {{ name }} }}")
+            try:
+                data = graphql(self.gh, fields, variables)
+            except Exception:  # e.g. a connection error, the next poll can still succeed
+                log.exception("Failed to check the state of pending forks")
+                data = {}
+            for i, p in enumerate(batch):
+                # the git data is copied after the repository is created
+                if (node := data.get(f"r{i}")) is not None and (node["defaultBranchRef"] or p.empty):
+                    log.info(f"Fork {p.fork.full_name} is ready")
+                    p.future.set_result(p.fork)
+                elif time.monotonic() > p.deadline:
+                    msg = f"Fork {p.fork.full_name} wasn’t ready after {self.timeout}s"
+                    p.future.set_exception(TimeoutError(msg))
+                else:
+                    still_pending.append(p)
+        return still_pending
@@ -0,0 +1,84 @@
+"""Persistent progress of a template sync run, so that an interrupted run can be resumed.
+
+Every completed milestone of a repo (its fork, the pushed branches, the PR) is appended as one JSON line
+together with the release tag. A resumed run skips the repos that are done
+and continues the others after their last milestone.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from ._log import log
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any
+
+
+@dataclass
+class Journal:
+    """
+    JSON lines file with the progress of the repos of a template sync run.
+
+    Parameters
+    ----------
+    path
+        location of the journal file
+    tag_name
+        the release of the template that is synced. Entries for other releases are ignored.
+    resume
+        Load the progress of the previous run from `path` and append to it.
+        Otherwise, the journal is started from scratch.
+    """
+
+    path: Path
+    tag_name: str
+    resume: bool = False
+
+    progress: dict[str, dict[str, dict[str, Any]]] = field(init=False)
+    """The completed steps of each repo, with the data recorded for them"""
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.progress = {}
+        if not self.resume:
+            self.path.write_text("")
+            return
+        try:
+            text = self.path.read_text()
+        except FileNotFoundError:
+            return
+        if text and not text.endswith("\n"):
+            # the run was killed while writing the last line, drop it so new entries start on their own line
+            text, _, partial = text.rpartition("\n")
+            text = text + "\n" if text else ""
+            log.warning(f"Ignoring incomplete journal entry {partial!r}")
+            self.path.write_text(text)
+        for line in text.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                log.warning(f"Ignoring corrupt journal entry {line!r}")
+                continue
+            if entry.pop("tag") == self.tag_name:
+                repo, step = entry.pop("repo"), entry.pop("step")
+                self.progress.setdefault(repo, {})[step] = entry
+        log.info(f"Resuming {self.tag_name} run: {len(self.finished())} of {len(self.progress)} repos are done")
+
+    def completed(self, repo_url: str) -> dict[str, dict[str, Any]]:
+        """The steps of `repo_url` that were completed in the previous run, with their recorded data."""
+        return self.progress.get(repo_url, {})
+
+    def finished(self) -> dict[str, str | None]:
+        """The results of the repos that completed all steps in the previous run."""
+        return {repo: steps["pr"]["result"] for repo, steps in self.progress.items() if "pr" in steps}
+
+    def record(self, repo_url: str, step: str, **data: Any) -> None:  # noqa: ANN401
+        """Append that `repo_url` completed `step`, with some (JSON-serializable) data to restore its outcome."""
+        entry = {"tag": self.tag_name, "repo": repo_url, "step": step, **data}
+        with self._lock, self.path.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
@@ -3,9 +3,6 @@ from __future__ import annotations
 import io
 import re
 
-from rich.console import Console
-from rich.markdown import Markdown
-
 dev_docs_url = "https://cookiecutter-scverse-instance.readthedocs.io/page/developer_docs.html"
 
 message = f"""\
@@ -57,6 +54,9 @@ We expect developers of scverse ecosystem packages to
 
 
 def main() -> None:
+    from rich.console import Console
+    from rich.markdown import Markdown
+
     file = io.StringIO()
     console = Console(
         file=file,
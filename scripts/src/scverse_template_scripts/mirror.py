@@ -0,0 +1,123 @@
+"""Persistent cache of target repositories, kept across template sync runs.
+
+Every target repository gets one bare repository with the scverse-bot fork as `origin`
+and the original repository as `upstream`.
+Instead of a full clone, a run then fetches only new objects and adds a cheap worktree.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import shutil
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING
+
+from ._log import log
+from .trace import span
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+    from git.repo import Repo
+
+    from .backoff import RetryPolicy
+
+
+@dataclass
+class MirrorCache:
+    """
+    Directory with one bare repository per target repository, limited in size by evicting the least recently used.
+
+    Parameters
+    ----------
+    path
+        directory in which the bare repositories are stored
+    max_size
+        maximum size in bytes that `evict` shrinks the cache to
+    """
+
+    path: Path
+    max_size: int
+
+    def __post_init__(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @contextlib.contextmanager
+    def worktree(
+        self, name: str, path: Path, *, origin: str, upstream: str, start: str, retry: RetryPolicy | None = None
+    ) -> Generator[Repo]:
+        """
+        Update the cached repository `name` and check out a (detached, empty) worktree of it at `path`.
+
+        Parameters
+        ----------
+        name
+            unique name of the repository in the cache
+        path
+            location of the worktree, has to be an empty directory or not exist
+        origin
+            URL of the fork, fetched without blobs. Can contain credentials,
+            which are removed from the cached config when leaving the context.
+        upstream
+            URL of the original repository
+        start
+            commit-ish to point the worktree’s HEAD to, e.g. `upstream/main`
+        retry
+            how to retry fetching `origin` (a new fork might not be ready for cloning yet).
+            If None, it is only tried once.
+        """
+        from furl import furl
+        from git.exc import GitCommandError
+        from git.repo import Repo
+
+        repo_dir = self.path / f"{name}.git"
+        if repo_dir.is_dir():
+            log.info(f"Updating cached repository {repo_dir}")
+            repo = Repo(repo_dir)
+            repo.git.worktree("prune")
+            repo.remote("origin").set_url(origin)
+            repo.remote("upstream").set_url(upstream)
+        else:
+            log.info(f"Creating cached repository {repo_dir}")
+            repo = Repo.init(repo_dir, bare=True)
+            repo.create_remote("origin", origin)
+            repo.create_remote("upstream", upstream)
+        os.utime(repo_dir)  # mark as recently used
+
+        existed = path.exists()
+        try:
+            fetch_origin = partial(repo.git.fetch, "origin", prune=True, filter="blob:none")
+            with span("git fetch origin", "git"):
+                if retry is None:
+                    fetch_origin()
+                else:
+                    retry(fetch_origin)
+            with span("git fetch upstream", "git"):
+                repo.git.fetch("upstream", prune=True)
+            repo.git.worktree("add", "--detach", "--no-checkout", str(path), start)
+            with Repo(path) as worktree:
+                yield worktree
+        finally:
+            with contextlib.suppress(GitCommandError):
+                repo.git.worktree("remove", "--force", str(path))
+            if existed:
+                path.mkdir(exist_ok=True)
+            repo.remote("origin").set_url(str(furl(origin).remove(username=True, password=True)))
+            repo.close()
+
+    def evict(self) -> None:
+        """Delete the least recently used repositories until the cache fits into `max_size`."""
+        repos = sorted(self.path.glob("*.git"), key=lambda p: p.stat().st_mtime, reverse=True)
+        total = 0
+        for repo_dir in repos:
+            total += _dir_size(repo_dir)
+            if total > self.max_size:
+                log.info(f"Evicting {repo_dir} from cache")
+                shutil.rmtree(repo_dir)
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file() and not f.is_symlink())
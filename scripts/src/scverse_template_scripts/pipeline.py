@@ -0,0 +1,103 @@
+"""Run jobs through a sequence of stages, each with its own pool of worker threads.
+
+Stages are connected by bounded queues, so a slow stage applies backpressure to the ones before it
+instead of letting work (and e.g. temporary clones) pile up in between.
+"""
+
+from __future__ import annotations
+
+from dataclasses import KW_ONLY, dataclass
+from queue import Queue
+from threading import Lock, Thread
+from typing import TYPE_CHECKING
+
+from ._log import log
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
+    from typing import Any
+
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class Stage[J]:
+    """One step of a `Pipeline`.
+
+    `fn` processes a job and returns whether the job should be passed on to the next stage.
+    """
+
+    name: str
+    fn: Callable[[J], bool]
+    workers: int = 1
+
+
+def _ignore(_job: object) -> None:
+    pass
+
+
+@dataclass
+class Pipeline[J]:
+    """Stages that jobs pass through in order, with stages working on different jobs concurrently."""
+
+    stages: Sequence[Stage[J]]
+    _: KW_ONLY
+    on_error: Callable[[J, Stage[J], Exception], None]
+    """Called when a stage raises. The job is not passed on to later stages."""
+    on_finish: Callable[[J], None] = _ignore
+    """Called exactly once per job, once it left the pipeline (successfully, early, or with an error).
+
+    Errors raised by `on_error` and `on_finish` are logged, they don’t stop the pipeline.
+    """
+
+    def run(self, jobs: Iterable[J]) -> None:
+        """Feed `jobs` into the first stage and block until all of them left the pipeline."""
+        queues: list[Queue[Any]] = [Queue(maxsize=stage.workers) for stage in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        lock = Lock()
+        threads = [
+            Thread(target=self._work, args=(i, queues, remaining, lock), name=f"{stage.name}-{n}", daemon=True)
+            for i, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for job in jobs:
+                queues[0].put(job)
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+
+    def _work(self, i: int, queues: list[Queue[Any]], remaining: list[int], lock: Lock) -> None:
+        stage = self.stages[i]
+        try:
+            while (job := queues[i].get()) is not _DONE:
+                try:
+                    proceed = stage.fn(job)
+                except Exception as e:
+                    _call(self.on_error, job, stage, e)
+                    proceed = False
+                if proceed and i + 1 < len(self.stages):
+                    queues[i + 1].put(job)
+                else:
+                    _call(self.on_finish, job)
+        finally:
+            # the last worker of a stage to shut down tells the next stage that no more jobs are coming
+            with lock:
+                remaining[i] -= 1
+                last = remaining[i] == 0
+            if last and i + 1 < len(self.stages):
+                for _ in range(self.stages[i + 1].workers):
+                    queues[i + 1].put(_DONE)
+
+
+def _call[**P](callback: Callable[P, None], *args: P.args, **kwargs: P.kwargs) -> None:
+    """Call `callback`, logging instead of raising errors, so the worker keeps going."""
+    try:
+        callback(*args, **kwargs)
+    except Exception:
+        log.exception(f"Error in pipeline callback {callback!r}")
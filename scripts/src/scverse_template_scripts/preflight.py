@@ -0,0 +1,177 @@
+"""Batched lookup of everything the template sync needs to know about the target repos before cloning them.
+
+Instead of several REST calls per repo (repository, fork, default branch, `.cruft.json`, pull requests),
+a few GraphQL queries fetch this for a whole batch of repos at once.
+The later steps then work from the resulting `RepoSnapshot`s.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import batched
+from typing import TYPE_CHECKING
+
+from ._log import log
+from .prs import PR_FIELDS, parse_prs, search_query
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from typing import Any
+
+    from github import Github
+    from github.Repository import Repository
+
+    from .prs import PRInfo
+
+
+REPO_FIELDS = "databaseId name nameWithOwner url owner { login }"
+
+
+@dataclass
+class RepoSnapshot:
+    """The state of a target repository (and its fork) before the template sync"""
+
+    repo: Repository
+    """The original repository, with `full_name`, `clone_url`, `default_branch` etc. populated"""
+    fork: Repository | None
+    """The fork in the namespace of the bot user, if it already exists"""
+    cruft_json: str | None
+    """Content of `.cruft.json` in the default branch, if it exists"""
+    root_commit: str | None
+    """The initial commit of the default branch (`None` for empty repos or if it couldn’t be determined)"""
+    prs: list[PRInfo]
+    """Template update PRs in any state"""
+
+
+def snapshot_repos(
+    gh: Github, repos: Iterable[str], *, login: str, head_prefix: str, batch_size: int = 20
+) -> dict[str, RepoSnapshot]:
+    """
+    Take snapshots of `repos` using two GraphQL queries per `batch_size` repos.
+
+    Parameters
+    ----------
+    gh
+        GitHub API client
+    repos
+        full names of the repositories, e.g. `scverse/scirpy`
+    login
+        the user who forks the repos and makes the PRs
+    head_prefix
+        branch name prefix of the template update PRs
+    batch_size
+        number of repos per query (bounded by GitHub’s query complexity limits)
+
+    Returns
+    -------
+    Snapshots by full name. Repos that don’t exist or whose batch failed are missing.
+    """
+    from github import GithubException
+
+    snapshots: dict[str, RepoSnapshot] = {}
+    for batch in batched(repos, batch_size):
+        try:
+            snapshots.update(_snapshot_batch(gh, batch, login=login, head_prefix=head_prefix))
+        except GithubException:
+            log.exception(f"Preflight failed for {', '.join(batch)}, falling back to individual requests")
+    log.info(f"Preflight: got snapshots of {len(snapshots)} repos")
+    return snapshots
+
+
+def _snapshot_batch(gh: Github, repos: tuple[str, ...], *, login: str, head_prefix: str) -> dict[str, RepoSnapshot]:
+    from github import GithubException
+
+    variables: dict[str, Any] = {"login": login}
+    fields = []
+    for i, full_name in enumerate(repos):
+        variables[f"owner{i}"], variables[f"name{i}"] = full_name.split("/", 1)
+        variables[f"search{i}"] = search_query(full_name, author=login, head_prefix=head_prefix)
+        fields.append(f"""
+            r{i}: repository(owner: $owner{i}, name: $name{i}) {{
+              {REPO_FIELDS}
+              defaultBranchRef {{ name target {{ oid ... on Commit {{ history {{ totalCount }} }} }} }}
+              cruft: object(expression: "HEAD:.cruft.json") {{ ... on Blob {{ text }} }}
+            }}
+            f{i}: repository(owner: $login, name: $name{i}) {{ {REPO_FIELDS} parent {{ nameWithOwner }} }}
+            s{i}: search(type: ISSUE, query: $search{i}, first: 100) {{
+              nodes {{ ... on PullRequest {{ {PR_FIELDS} }} }}
+            }}
+        """)
+    data = graphql(gh, fields, variables)
+
+    snapshots: dict[str, RepoSnapshot] = {}
+    root_cursors: dict[str, str] = {}
+    for i, full_name in enumerate(repos):
+        if (node := data[f"r{i}"]) is None:
+            log.warning(f"Preflight: repository {full_name} not found")
+            continue
+        branch = node["defaultBranchRef"]
+        n_commits = branch["target"]["history"]["totalCount"] if branch else 0
+        fork = data[f"f{i}"]
+        is_fork = fork is not None and (fork["parent"] or {}).get("nameWithOwner") == node["nameWithOwner"]
+        snapshots[full_name] = RepoSnapshot(
+            repo=_to_repo(gh, node, default_branch=branch and branch["name"]),
+            fork=_to_repo(gh, fork, default_branch=branch and branch["name"]) if is_fork else None,
+            cruft_json=(node["cruft"] or {}).get("text"),
+            root_commit=branch["target"]["oid"] if n_commits == 1 else None,
+            prs=parse_prs(data[f"s{i}"]["nodes"], author=login, head_prefix=head_prefix),
+        )
+        if n_commits > 1:
+            # the history is paginated with cursors of the form “<head> <offset>”, so skip to the last commit
+            root_cursors[full_name] = f"{branch['target']['oid']} {n_commits - 2}"
+
+    if root_cursors:
+        variables = {}
+        fields = []
+        for i, (full_name, cursor) in enumerate(root_cursors.items()):
+            variables[f"owner{i}"], variables[f"name{i}"] = full_name.split("/", 1)
+            variables[f"cursor{i}"] = cursor
+            fields.append(f"""
+                c{i}: repository(owner: $owner{i}, name: $name{i}) {{
+                  defaultBranchRef {{ target {{ ... on Commit {{ history(first: 1, after: $cursor{i}) {{
+                    nodes {{ oid }}
+                  }} }} }} }}
+                }}
+            """)
+        try:
+            data = graphql(gh, fields, variables)
+        except GithubException:
+            log.exception(f"Preflight: failed to get the root commits of {', '.join(root_cursors)}")
+            data = {}
+        for i, full_name in enumerate(root_cursors):
+            # if this didn’t work, the root commit will be determined from the clone
+            if (node := data.get(f"c{i}")) and (nodes := node["defaultBranchRef"]["target"]["history"]["nodes"]):
+                snapshots[full_name].root_commit = nodes[-1]["oid"]
+    return snapshots
+
+
+def graphql(gh: Github, fields: list[str], variables: dict[str, Any]) -> dict[str, Any]:
+    """Run a query consisting of `fields`, tolerating repositories that aren’t found."""
+    from github import GithubException
+
+    declarations = ", ".join(f"${name}: String!" for name in variables)
+    query = f"query({declarations}) {{ {''.join(fields)} }}"
+    headers, data = gh.requester.requestJsonAndCheck(
+        "POST", gh.requester.graphql_url, input={"query": query, "variables": variables}
+    )
+    if errors := [e for e in data.get("errors", []) if e.get("type") != "NOT_FOUND"]:
+        raise GithubException(400, {"errors": errors}, headers)
+    return data["data"]
+
+
+def _to_repo(gh: Github, node: dict[str, Any], *, default_branch: str | None) -> Repository:
+    """Create a `Repository` with the attributes we use, without having to request it again."""
+    from github.Repository import Repository
+
+    full_name = node["nameWithOwner"]
+    raw_data = {
+        "id": node["databaseId"],
+        "name": node["name"],
+        "full_name": full_name,
+        "owner": {"login": node["owner"]["login"]},
+        "html_url": node["url"],
+        "clone_url": f"{node['url']}.git",
+        "url": f"{gh.requester.base_url}/repos/{full_name}",
+        "default_branch": default_branch,
+    }
+    return gh.create_from_raw_data(Repository, raw_data)
@@ -0,0 +1,123 @@
+"""Lookup of existing template update pull requests.
+
+Paging through all pull requests of a long-lived repository takes dozens of API calls,
+so instead, one search filtered by head branch finds all template update PRs of a repository.
+The result is cached across runs, so repos that already have a PR for the current release don’t need any call,
+and PRs that the search index doesn’t know yet aren’t missed.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, TypedDict
+
+from ._log import log
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Literal
+
+    from github import Github
+
+
+class PRInfo(TypedDict):
+    """The information about a pull request needed to find template update PRs"""
+
+    number: int
+    head_ref: str
+    state: Literal["open", "closed", "merged"]
+    author: str
+
+
+PR_FIELDS = "number state headRefName author { login }"
+
+SEARCH_QUERY = f"""
+query($q: String!) {{
+  search(type: ISSUE, query: $q, first: 100) {{
+    nodes {{ ... on PullRequest {{ {PR_FIELDS} }} }}
+  }}
+}}
+"""
+
+
+def search_query(repo: str, *, author: str, head_prefix: str) -> str:
+    """Search query for pull requests in `repo` by `author` from branches starting with `head_prefix`."""
+    return f"repo:{repo} is:pr author:{author} head:{head_prefix}"
+
+
+def parse_prs(nodes: list[dict[str, Any]], *, author: str, head_prefix: str) -> list[PRInfo]:
+    """Convert the search result nodes for `search_query` (with `PR_FIELDS`) into `PRInfo`s."""
+    return [
+        PRInfo(number=node["number"], head_ref=node["headRefName"], state=node["state"].lower(), author=author)
+        for node in nodes
+        # the search matches words in branch names, so check the prefix again
+        if node and node["headRefName"].startswith(head_prefix) and (node["author"] or {}).get("login") == author
+    ]
+
+
+def find_prs(gh: Github, repo: str, *, author: str, head_prefix: str) -> list[PRInfo]:
+    """
+    Find all pull requests (in any state) in `repo` by `author` from branches starting with `head_prefix`.
+
+    Uses a single GraphQL search request (the `head:` qualifier matches branch name prefixes).
+
+    Parameters
+    ----------
+    gh
+        GitHub API client
+    repo
+        full name of the repository, e.g. `scverse/scirpy`
+    author
+        login of the PR author
+    head_prefix
+        prefix of the head branch names
+    """
+    query = search_query(repo, author=author, head_prefix=head_prefix)
+    _, data = gh.requester.graphql_query(SEARCH_QUERY, {"q": query})
+    return parse_prs(data["data"]["search"]["nodes"], author=author, head_prefix=head_prefix)
+
+
+@dataclass
+class PRCache:
+    """
+    Known template update PRs per repository, persisted across runs.
+
+    Parameters
+    ----------
+    path
+        directory with one JSON file per repository
+    """
+
+    path: Path
+
+    def __post_init__(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def load(self, repo_id: str) -> list[PRInfo]:
+        """Get the known PRs of `repo_id` (empty if none are known)."""
+        try:
+            return json.loads((self.path / f"{repo_id}.json").read_text())
+        except FileNotFoundError:
+            return []
+        except ValueError:
+            log.warning(f"Ignoring corrupt PR cache for {repo_id}")
+            return []
+
+    def save(self, repo_id: str, prs: list[PRInfo]) -> None:
+        """Replace the known PRs of `repo_id`."""
+        tmp = self.path / f"{repo_id}.json.tmp"
+        tmp.write_text(json.dumps(prs, indent=2))
+        tmp.replace(self.path / f"{repo_id}.json")
+
+    def update(self, repo_id: str, prs: list[PRInfo]) -> list[PRInfo]:
+        """
+        Add the PRs of `repo_id` found by a search to the known ones, and return all of them.
+
+        Known PRs that the search doesn’t find (yet) are kept, as its index lags behind.
+        Found PRs replace known ones with the same number, as their state is more recent.
+        """
+        found = {pr["number"] for pr in prs}
+        merged = [*prs, *(pr for pr in self.load(repo_id) if pr["number"] not in found)]
+        self.save(repo_id, merged)
+        return merged
@@ -0,0 +1,91 @@
+"""Scheduling of GitHub API requests within GitHub’s rate limits.
+
+See https://docs.github.com/en/rest/using-the-rest-api/best-practices-for-using-the-rest-api
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from ._log import log
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+
+WRITE_METHODS = frozenset({"POST", "PATCH", "PUT", "DELETE"})
+
+
+@dataclass
+class RateLimiter:
+    """
+    Token bucket for GitHub API requests that adapts to the rate limit response headers.
+
+    Requests are let through at `rate` per second, with bursts of up to `burst` requests.
+    Content-creating requests (e.g. forks, pull requests) are additionally spaced `write_interval` seconds apart,
+    as GitHub recommends to avoid secondary rate limits.
+    Once less than `reserve` requests of the primary rate limit are left,
+    the rate drops so that the remaining ones are spread evenly until the limit resets.
+    When GitHub asks to back off (`retry-after` or an exhausted limit), all requests wait until then.
+
+    Thread-safe: waiting threads reserve their slot, so they don’t need to wake each other up.
+    """
+
+    rate: float = 10
+    burst: int = 20
+    write_interval: float = 1
+    reserve: int = 500
+
+    throttled: float = field(default=0, init=False)
+    """Total time in seconds that requests spent waiting (summed over all threads)"""
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _tokens: float = field(init=False, repr=False)
+    _updated: float = field(default_factory=time.monotonic, init=False, repr=False)
+    _current_rate: float = field(init=False, repr=False)
+    _next_write: float = field(default=0, init=False, repr=False)
+    _blocked_until: float = field(default=0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._tokens = self.burst
+        self._current_rate = self.rate
+
+    def acquire(self, verb: str, url: str) -> None:
+        """Wait until a request may be made."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._current_rate)
+            self._updated = now
+            # take a token even if there is none, the debt delays the requests after this one
+            self._tokens -= 1
+            start = max(now, self._blocked_until, now - self._tokens / self._current_rate)
+            if verb.upper() in WRITE_METHODS and not url.endswith("/graphql"):
+                start = max(start, self._next_write)
+                self._next_write = start + self.write_interval
+            wait = start - now
+            self.throttled += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Adapt to the rate limit state reported in a response’s headers, regardless of its status."""
+        now = time.monotonic()
+        block_until = None
+        if (retry_after := headers.get("retry-after")) is not None:
+            block_until = now + float(retry_after)
+        remaining, reset = headers.get("x-ratelimit-remaining"), headers.get("x-ratelimit-reset")
+        if remaining is not None and reset is not None:
+            reset_in = max(float(reset) - time.time(), 1)
+            if int(remaining) == 0:
+                block_until = max(block_until or now, now + reset_in)
+            with self._lock:
+                low = int(remaining) < self.reserve
+                self._current_rate = min(self.rate, max(int(remaining), 1) / reset_in) if low else self.rate
+        if block_until is not None:
+            with self._lock:
+                if block_until > self._blocked_until:
+                    log.warning(f"GitHub rate limit reached, pausing requests for {block_until - now:.0f}s")
+                    self._blocked_until = block_until
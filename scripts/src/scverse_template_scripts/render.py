@@ -0,0 +1,377 @@
+"""Rendering the template for the target repos of a template sync run."""
+
+from __future__ import annotations
+
+import contextlib
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from subprocess import run
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from threading import Lock
+from typing import TYPE_CHECKING, Protocol
+
+from ._log import log
+from .trace import span, tracer
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Mapping
+    from typing import IO, Any
+
+    from cookiecutter.environment import StrictEnvironment
+    from jinja2 import Template
+
+
+HOOK_TIMINGS_VAR = "COOKIECUTTER_SCVERSE_HOOK_TIMINGS"
+"""Environment variable with a file to which the template’s hooks append the durations of their steps.
+
+See `hook_step`.
+"""
+
+
+class Renderer(Protocol):
+    """Instantiates the template into `output_dir` and returns the directory of the rendered project."""
+
+    def __call__(self, output_dir: Path, *, cruft_log_file: Path, extra_context: dict) -> Path: ...
+
+
+def render_template(output_dir: Path, *, cruft_log_file: Path, extra_context: dict, template_dir: str) -> Path:
+    """
+    Instantiate the cookiecutter template into `output_dir` using `cruft create`.
+
+    Parameters
+    ----------
+    output_dir
+        (empty) directory in which the project directory will be created
+    cruft_log_file
+        file to which the cruft log will be written
+    extra_context
+        cookiecutter configuration to be passed to cruft as `--extra-context-file`
+    template_dir
+        path to the template (cloned git repository, already checked out at the desired tag)
+
+    Returns
+    -------
+    The directory containing the rendered project
+    """
+    # Initialize a new repo off the current template version, using the configuration from .cruft.json
+    cookiecutter_config_file = output_dir / "cookiecutter.json"
+    with cookiecutter_config_file.open("w") as f:
+        # need to put the cookiecutter-related info from .cruft.json into separate file
+        json.dump(extra_context, f)
+
+    # run in a subprocess, otherwise not possible to capture output of post-run hooks
+    with cruft_log_file.open("w") as log_f:
+        # Do not specify --checkout to point to a specific tag.
+        # The correct version is already checked out in `template_dir`
+        cmd = [
+            sys.executable,
+            "-m",
+            "cruft",
+            "create",
+            template_dir,
+            "--no-input",
+            f"--extra-context-file={cookiecutter_config_file}",
+        ]
+        log.info("Running " + " ".join(cmd))
+        with hook_timings() as env:
+            run(cmd, stdout=log_f, stderr=log_f, check=True, cwd=output_dir, env=env)
+    return output_dir / extra_context["project_name"]
+
+
+@contextlib.contextmanager
+def hook_timings() -> Generator[dict[str, str]]:
+    """
+    Trace the steps of the template’s hooks that run inside this context.
+
+    Yields the environment variables to run the hooks with (or e.g. `cookiecutter` in a subprocess),
+    in which they record the durations of their steps (see `hook_step`).
+    When the context exits, these are added to the trace as spans of the category `hook`.
+    """
+    with TemporaryDirectory() as td:
+        path = Path(td, "timings.jsonl")
+        yield {**os.environ, HOOK_TIMINGS_VAR: str(path)}
+        if path.is_file():
+            for line in path.read_text().splitlines():
+                step = json.loads(line)
+                tracer.add(step["step"], "hook", start=step["start"], duration=step["duration"], hook=step["hook"])
+
+
+@contextlib.contextmanager
+def hook_step(hook: str, step: str) -> Generator[None]:
+    """
+    Record the duration of a step of one of the template’s hooks.
+
+    The hooks import this only if :data:`HOOK_TIMINGS_VAR` is set,
+    which happens only when they are run from this package and therefore with a Python that can import it.
+
+    Parameters
+    ----------
+    hook
+        name of the hook, e.g. `pre_gen_project`
+    step
+        name of the step
+    """
+    start, start_perf = time.time(), time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start_perf
+        with Path(os.environ[HOOK_TIMINGS_VAR]).open("a") as f:
+            f.write(json.dumps({"hook": hook, "step": step, "start": start, "duration": duration}) + "\n")
+
+
+@dataclass
+class TemplateRenderer:
+    """
+    Renders the template in-process, producing the same output as `render_template`.
+
+    Instead of starting a `cruft create` subprocess per repo (with a fresh clone of the template,
+    interpreter start and imports), this reuses one Jinja environment including its compiled templates
+    across all renders. Only the hooks run in a subprocess, so their output can be captured.
+
+    Parameters
+    ----------
+    template_dir
+        path to the template (git repository, already checked out at the desired tag).
+        Must not be modified while the renderer is in use.
+    """
+
+    template_dir: Path
+    env: StrictEnvironment = field(init=False, repr=False)
+    project_template: Path = field(init=False)
+    commit: str = field(init=False)
+
+    _user_config: dict[str, Any] = field(init=False, repr=False)
+    _hooks: dict[str, list[tuple[Path, Template]]] = field(init=False, repr=False)
+    _compiled: dict[str, Template] = field(default_factory=dict, init=False, repr=False)
+    _newlines: dict[Path, str | None] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        from cookiecutter.config import get_user_config
+        from cookiecutter.environment import StrictEnvironment
+        from cookiecutter.find import find_template
+        from cookiecutter.generate import generate_context
+        from git.repo import Repo
+        from jinja2 import FileSystemLoader
+
+        self.template_dir = self.template_dir.absolute()
+        with Repo(self.template_dir) as repo:
+            self.commit = repo.head.commit.hexsha
+        self._user_config = get_user_config()
+        # `_jinja2_env_vars` and `_extensions` are taken from the template, so they are the same for all repos
+        context = generate_context(context_file=self.template_dir / "cookiecutter.json")
+        envvars = context["cookiecutter"].get("_jinja2_env_vars", {})
+        self.env = StrictEnvironment(context=context, keep_trailing_newline=True, **envvars)
+        self.project_template = find_template(self.template_dir, self.env)
+        self.env.loader = FileSystemLoader([self.project_template, self.template_dir / "templates"])
+        self._hooks = {
+            name: [
+                (path, self.env.from_string(path.read_text()))
+                for path in sorted((self.template_dir / "hooks").glob(f"{name}.*"))
+                if not path.name.endswith("~")
+            ]
+            for name in ("pre_gen_project", "post_gen_project")
+        }
+
+    def context(self, extra_context: dict) -> dict[str, Any]:
+        """Generate the cookiecutter context like `cruft create --no-input` does."""
+        from cookiecutter.generate import generate_context
+        from cookiecutter.prompt import prompt_for_config
+
+        context = generate_context(
+            context_file=self.template_dir / "cookiecutter.json",
+            default_context=self._user_config["default_context"],
+            extra_context=extra_context,
+        )
+        context["cookiecutter"] = prompt_for_config(context, no_input=True)
+        context["cookiecutter"]["_template"] = str(self.template_dir)
+        context["cookiecutter"]["_commit"] = self.commit
+        return context
+
+    def __call__(self, output_dir: Path, *, cruft_log_file: Path, extra_context: dict) -> Path:
+        """Instantiate the template into `output_dir`, see `render_template`."""
+        context = self.context(extra_context)
+        project_dir = output_dir / self._compile(self.project_template.name).render(**context)
+        project_dir.mkdir()
+        log.info(f"Rendering template into {project_dir}")
+        with cruft_log_file.open("w") as log_f, hook_timings() as env:
+            self._run_hooks("pre_gen_project", project_dir, context, log_f=log_f, env=env)
+            self._generate_files(project_dir, context)
+            self._run_hooks("post_gen_project", project_dir, context, log_f=log_f, env=env)
+
+        cruft_content = {
+            "template": str(self.template_dir),
+            "commit": self.commit,
+            "checkout": None,
+            "context": context,
+            "directory": None,
+        }
+        (project_dir / ".cruft.json").write_text(
+            json.dumps(cruft_content, ensure_ascii=False, indent=2, separators=(",", ": ")) + "\n"
+        )
+        return project_dir
+
+    def _generate_files(self, project_dir: Path, context: dict[str, Any]) -> None:
+        """
+        Like `cookiecutter.generate.generate_files`, but without changing the working directory.
+
+        Creates the directories first, then copies the files that aren’t rendered, then renders the others.
+        """
+        with span("plan files", "render"):
+            copies, renders = self._plan_files(project_dir, context)
+        with span("copy files", "render"):
+            for infile, outfile in copies:
+                if infile.is_dir():
+                    shutil.copytree(infile, outfile, dirs_exist_ok=True)
+                else:
+                    shutil.copyfile(infile, outfile)
+                    shutil.copymode(infile, outfile)
+        with span("render files", "render"):
+            for rel, infile, outfile in renders:
+                rendered = self.env.get_template(rel).render(**context)
+                newline = context["cookiecutter"].get("_new_lines") or self._newline(infile)
+                with outfile.open("w", encoding="utf-8", newline=newline) as fh:
+                    fh.write(rendered)
+                shutil.copymode(infile, outfile)
+
+    def _plan_files(
+        self, project_dir: Path, context: dict[str, Any]
+    ) -> tuple[list[tuple[Path, Path]], list[tuple[str, Path, Path]]]:
+        """
+        Create the project’s directories, and return the files and directories to copy and the files to render.
+
+        Returns
+        -------
+        copies
+            source and destination of files and directories matching `_copy_without_render`, and binary files
+        renders
+            template name, source, and destination of the files to render
+        """
+        from binaryornot.check import is_binary
+
+        copy_only = context["cookiecutter"].get("_copy_without_render", [])
+
+        def is_copy_only(rel: str) -> bool:
+            return any(fnmatch.fnmatch(rel, pattern) for pattern in copy_only)
+
+        def render_path(rel: str) -> Path:
+            return project_dir / self._compile(rel).render(**context)
+
+        copies: list[tuple[Path, Path]] = []
+        renders: list[tuple[str, Path, Path]] = []
+        for root, dirs, files in os.walk(self.project_template):
+            rel_root = os.path.relpath(root, self.project_template)
+            render_dirs = []
+            for d in sorted(dirs):
+                rel = os.path.normpath(os.path.join(rel_root, d))
+                if is_copy_only(rel):
+                    copies.append((Path(root, d), render_path(rel)))
+                else:
+                    render_dirs.append(d)
+                    render_path(rel).mkdir(parents=True, exist_ok=True)
+            dirs[:] = render_dirs
+
+            for f in sorted(files):
+                infile = Path(root, f)
+                rel = os.path.normpath(os.path.join(rel_root, f))
+                outfile = render_path(rel)
+                if outfile.is_dir():  # the rendered file name is empty
+                    continue
+                if is_copy_only(rel) or is_binary(str(infile)):
+                    copies.append((infile, outfile))
+                else:
+                    renders.append((rel.replace(os.path.sep, "/"), infile, outfile))
+        return copies, renders
+
+    def _compile(self, source: str) -> Template:
+        """Compile a template string, e.g. a path (cached, the same paths are rendered for every repo)."""
+        if (template := self._compiled.get(source)) is None:
+            template = self._compiled[source] = self.env.from_string(source)
+        return template
+
+    def _newline(self, path: Path) -> str | None:
+        """Detect the newline character used in a template file (cached, the template doesn’t change)."""
+        if path not in self._newlines:
+            with path.open(encoding="utf-8") as f:
+                f.readline()
+            self._newlines[path] = f.newlines[0] if isinstance(f.newlines, tuple) else f.newlines
+        return self._newlines[path]
+
+    def _run_hooks(
+        self, name: str, project_dir: Path, context: dict[str, Any], *, log_f: IO[str], env: Mapping[str, str]
+    ) -> None:
+        for path, template in self._hooks[name]:
+            with NamedTemporaryFile("w", suffix=path.suffix, delete=False, encoding="utf-8") as script:
+                script.write(template.render(**context))
+            try:
+                cmd = [sys.executable, script.name] if path.suffix == ".py" else [script.name]
+                if path.suffix != ".py":
+                    Path(script.name).chmod(0o700)
+                log_f.flush()
+                with span(name, "render"):
+                    run(cmd, stdout=log_f, stderr=log_f, check=True, cwd=project_dir, env=env)
+            finally:
+                Path(script.name).unlink()
+
+
+@dataclass
+class RenderCache:
+    """
+    Renderings of the template, keyed by the cookiecutter context they were rendered with.
+
+    Repos with an identical context reuse the same (read-only!) rendered project directory.
+    Only valid for one template version, i.e. one run.
+
+    Parameters
+    ----------
+    path
+        directory in which the renderings are stored
+    render
+        function to render the template, e.g. a `TemplateRenderer`
+        or `render_template` with the `template_dir` argument bound.
+    """
+
+    path: Path
+    render: Renderer
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+    _key_locks: dict[str, Lock] = field(default_factory=dict, init=False, repr=False)
+    _renderings: dict[str, tuple[Path, Path]] = field(default_factory=dict, init=False, repr=False)
+    """Rendered project directory and cruft log file by key"""
+
+    def get(self, *, cruft_log_file: Path, extra_context: dict) -> Path:
+        """Render the template with `extra_context` (see `render_template`) or reuse an earlier rendering."""
+        key = hashlib.sha256(json.dumps(extra_context, sort_keys=True).encode()).hexdigest()
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, Lock())
+        # concurrent jobs with the same context wait for the first one to finish rendering
+        with key_lock:
+            if key in self._renderings:
+                with self._lock:
+                    self.hits += 1
+                project_dir, first_log_file = self._renderings[key]
+                log.info(f"Reusing template rendered for the same context ({first_log_file.name})")
+                cruft_log_file.write_text(f"Reused rendering with identical context, see {first_log_file.name}\n")
+                return project_dir
+
+            with self._lock:
+                self.misses += 1
+            output_dir = self.path / key
+            output_dir.mkdir(parents=True)
+            try:
+                with span("render template", "render"):
+                    project_dir = self.render(output_dir, cruft_log_file=cruft_log_file, extra_context=extra_context)
+            except BaseException:
+                shutil.rmtree(output_dir)
+                raise
+            self._renderings[key] = project_dir, cruft_log_file
+            return project_dir
@@ -0,0 +1,49 @@
+"""Splitting the repos of a template sync run across several runners.
+
+Every repo is assigned to a shard by a hash of its ID, so the assignment is the same on every runner
+and doesn’t change when repos are added to or removed from the list.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    One of `count` disjoint parts of the repos.
+
+    Parameters
+    ----------
+    index
+        the number of the shard, from 1 to `count`
+    count
+        total number of shards
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.index <= self.count:
+            msg = f"Invalid shard {self}, expected `<i>/<n>` with 1 ≤ i ≤ n"
+            raise ValueError(msg)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @classmethod
+    def parse(cls, spec: str) -> Shard:
+        """Parse a spec like `2/4`."""
+        index, sep, count = spec.partition("/")
+        if not sep or not index.isdigit() or not count.isdigit():
+            msg = f"Invalid shard {spec!r}, expected `<i>/<n>`, e.g. `1/4`"
+            raise ValueError(msg)
+        return cls(int(index), int(count))
+
+    def __contains__(self, repo_id: str) -> bool:
+        """Whether the repo with ID `repo_id` (e.g. `scverse-scirpy`) belongs to this shard."""
+        digest = hashlib.sha256(repo_id.lower().encode()).digest()
+        return int.from_bytes(digest[:8]) % self.count == self.index - 1
@@ -0,0 +1,168 @@
+"""Synchronize a rendered template into a checked-out target repository.
+
+Only files whose content differs are written, and only files that are no longer rendered are removed,
+so unchanged files keep their stat info and git doesn’t have to re-hash them.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import os
+import re
+import shutil
+import stat
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
+
+
+@dataclass
+class PathMatcher:
+    """
+    Matches relative paths against glob patterns with the semantics of git pathspecs (e.g. in `git restore <pattern>`).
+
+    `*` also matches `/`, and a pattern also matches everything in the directory it names.
+    All patterns are compiled into a single regular expression.
+    """
+
+    patterns: Sequence[str]
+    regex: re.Pattern[str] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        alternatives = [fnmatch.translate(p) for p in self.patterns]
+        alternatives += [re.escape(p.rstrip("/")) + "/" for p in self.patterns]
+        self.regex = re.compile("|".join(f"(?:{a})" for a in alternatives) or "(?!)")
+
+    def __call__(self, path: str) -> bool:
+        return self.regex.match(path) is not None
+
+
+def path_matcher(patterns: Iterable[str]) -> PathMatcher:
+    """Compile `patterns` into a `PathMatcher`, reusing it for the same patterns (e.g. for all repos of a run)."""
+    return _path_matcher(tuple(patterns))
+
+
+@cache
+def _path_matcher(patterns: tuple[str, ...]) -> PathMatcher:
+    return PathMatcher(patterns)
+
+
+@dataclass
+class SyncStats:
+    """Number of files touched by `sync_tree`."""
+
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+
+    @property
+    def touched(self) -> int:
+        return self.added + self.changed + self.removed
+
+    def __str__(self) -> str:
+        return f"{self.added} added, {self.changed} changed, {self.removed} removed"
+
+
+def sync_tree(src: Path, dst: Path, *, exclude: Callable[[str], bool] | None = None) -> SyncStats:
+    """
+    Make `dst` contain the same files as `src`, like deleting everything in `dst` and copying `src` over.
+
+    `.git` directories in `src` are ignored and top level `.git*` paths in `dst` (e.g. `.git`, `.github`) are kept,
+    so files that only exist in the target repo’s `.github` directory survive.
+
+    Parameters
+    ----------
+    src
+        directory to copy from, e.g. the rendered template
+    dst
+        directory to update, e.g. a clone of the target repository
+    exclude
+        function that returns True for relative (POSIX) paths which should be left as they are in `dst`,
+        e.g. a `PathMatcher`
+
+    Returns
+    -------
+    The number of files that were added, changed, or removed in `dst`
+    """
+    src_files, src_dirs = scan_tree(src)
+    if exclude is not None:
+        src_files = {f for f in src_files if not exclude(f.as_posix())}
+    stats = SyncStats()
+    # remove first, so that files can take the place of removed directories and vice versa
+    stats.removed = _remove_stale(dst, src_files, src_dirs, exclude=exclude)
+    for rel in sorted(src_dirs):
+        (dst / rel).mkdir(exist_ok=True)
+    for rel in sorted(src_files):
+        source, target = src / rel, dst / rel
+        exists = target.is_symlink() or target.exists()
+        if exists and _same(source, target):
+            continue
+        if target.is_symlink():
+            target.unlink()
+        if source.is_symlink():
+            target.symlink_to(source.readlink())
+        else:
+            shutil.copy2(source, target)
+        if exists:
+            stats.changed += 1
+        else:
+            stats.added += 1
+    return stats
+
+
+def _remove_stale(
+    dst: Path, src_files: set[Path], src_dirs: set[Path], *, exclude: Callable[[str], bool] | None = None
+) -> int:
+    """Remove files and directories from `dst` that are not in `src`, keeping top level `.git*` and excluded paths."""
+    removed = 0
+    stale_dirs: list[Path] = []
+    for root, dirs, files in os.walk(dst):
+        rel_root = Path(root).relative_to(dst)
+        links = [d for d in dirs if Path(root, d).is_symlink()]
+        dirs[:] = [d for d in dirs if d not in links and (rel_root.parts or not d.startswith(".git"))]
+        stale_dirs.extend(Path(root, d) for d in dirs if rel_root / d not in src_dirs)
+        for name in files + links:
+            rel = rel_root / name
+            if not rel_root.parts and name.startswith(".git"):
+                continue
+            if rel not in src_files and (exclude is None or not exclude(rel.as_posix())):
+                Path(root, name).unlink()
+                removed += 1
+    for path in reversed(stale_dirs):
+        # its contents are not in `src` either, so they were removed above (unless excluded)
+        if not any(path.iterdir()):
+            path.rmdir()
+    return removed
+
+
+def scan_tree(path: Path) -> tuple[set[Path], set[Path]]:
+    """Relative paths of files (including symlinks) and directories in `path`, excluding `.git`."""
+    files: set[Path] = set()
+    dirs: set[Path] = set()
+    for root, subdirs, filenames in os.walk(path):
+        rel_root = Path(root).relative_to(path)
+        links = [d for d in subdirs if Path(root, d).is_symlink()]
+        subdirs[:] = [d for d in subdirs if d != ".git" and d not in links]
+        dirs.update(rel_root / d for d in subdirs)
+        files.update(rel_root / f for f in filenames + links)
+    return files, dirs
+
+
+def _same(a: Path, b: Path) -> bool:
+    """Check if two files have the same content and executable bit, or are symlinks to the same target."""
+    sa, sb = a.lstat(), b.lstat()
+    if stat.S_ISLNK(sa.st_mode) or stat.S_ISLNK(sb.st_mode):
+        return stat.S_ISLNK(sa.st_mode) and stat.S_ISLNK(sb.st_mode) and a.readlink() == b.readlink()
+    if not stat.S_ISREG(sb.st_mode) or sa.st_size != sb.st_size or (sa.st_mode ^ sb.st_mode) & 0o111:
+        return False
+    return _digest(a) == _digest(b)
+
+
+def _digest(path: Path) -> bytes:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").digest()
@@ -0,0 +1,121 @@
+"""Timing of the steps of a template sync run and of the operations they consist of.
+
+Code wraps operations in `span(name)`. The spans of a run can be exported in the Chrome trace event format
+(to view in https://ui.perfetto.dev or chrome://tracing) and summarized in a table.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+    from typing import Any
+
+    from rich.table import Table
+
+
+@dataclass(frozen=True)
+class Span:
+    """A timed operation"""
+
+    name: str
+    category: str
+    start: float
+    """Start time in seconds, relative to the start of the `Tracer`"""
+    duration: float
+    """Duration in seconds"""
+    thread: int
+    args: dict[str, Any]
+
+
+@dataclass
+class Tracer:
+    """Collects `Span`s from all threads."""
+
+    spans: list[Span] = field(default_factory=list)
+    origin: float = field(default_factory=time.perf_counter)
+    _threads: dict[int, str] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "step", **args: Any) -> Generator[None]:  # noqa: ANN401
+        """Time the body of the `with` statement, e.g. `with tracer.span("clone", repo=url): ...`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._append(name, category, start, time.perf_counter() - start, args)
+
+    def add(self, name: str, category: str, *, start: float, duration: float, **args: Any) -> None:  # noqa: ANN401
+        """Record an operation timed elsewhere, e.g. in a subprocess. `start` is a `time.time()` timestamp."""
+        self._append(name, category, time.perf_counter() - (time.time() - start), duration, args)
+
+    def _append(self, name: str, category: str, start: float, duration: float, args: dict[str, Any]) -> None:
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads[thread.ident or 0] = thread.name
+            self.spans.append(Span(name, category, start - self.origin, duration, thread.ident or 0, args))
+
+    def export(self, path: Path) -> None:
+        """Write the spans as a Chrome trace event file."""
+        pid = os.getpid()
+        with self._lock:
+            threads = [
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self._threads.items()
+            ]
+            events = [
+                {
+                    "name": s.name,
+                    "cat": s.category,
+                    "ph": "X",
+                    "ts": s.start * 1e6,
+                    "dur": s.duration * 1e6,
+                    "pid": pid,
+                    "tid": s.thread,
+                    "args": s.args,
+                }
+                for s in self.spans
+            ]
+        path.write_text(json.dumps({"traceEvents": threads + events}))
+
+    def summary(self) -> Table:
+        """A table with the number, total, median and 95th percentile of the durations of spans per name."""
+        from rich.table import Table
+
+        durations: dict[tuple[str, str], list[float]] = defaultdict(list)
+        with self._lock:
+            for s in self.spans:
+                durations[s.category, s.name].append(s.duration)
+        table = Table("Category", "Span", "Count", "Total", "p50", "p95", title="Timings")
+        for (category, name), ds in sorted(durations.items()):
+            ds.sort()
+            table.add_row(
+                category,
+                name,
+                str(len(ds)),
+                f"{sum(ds):.2f}s",
+                f"{_percentile(ds, 50):.2f}s",
+                f"{_percentile(ds, 95):.2f}s",
+            )
+        return table
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a sorted, non-empty list."""
+    return sorted_values[max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)]
+
+
+tracer = Tracer()
+"""The tracer for the current process"""
+span = tracer.span
@@ -0,0 +1,276 @@
+"""A local stand-in for the parts of the GitHub API used by `scverse_template_scripts`.
+
+It doesn’t parse GraphQL, but answers the aliased fields that it queries
+based on the variables that are passed along with them.
+Optionally, it also keeps bare git repositories for the repos, so that forks can be cloned and pushed to.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs
+
+from git.repo import Repo
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+    from typing import Any, Self
+
+
+@dataclass
+class FakePR:
+    number: int
+    head_ref: str
+    state: str = "OPEN"
+    author: str | None = "scverse-bot"
+    indexed: bool = True
+    """Whether the search finds it yet (GitHub’s search index lags behind)"""
+
+
+@dataclass
+class FakeRepo:
+    full_name: str
+    commits: list[str] = field(default_factory=lambda: ["0" * 40])
+    """Commit IDs of the default branch, oldest first"""
+    files: dict[str, str] = field(default_factory=dict)
+    prs: list[FakePR] = field(default_factory=list)
+    parent: str | None = None
+    default_branch: str = "main"
+    tags: dict[str, str] = field(default_factory=dict)
+    """Commit IDs of tags, each with a release"""
+    database_id: int = field(default_factory=lambda: next(_ids))
+
+    def node(self, base_url: str) -> dict[str, Any]:
+        owner, name = self.full_name.split("/")
+        head = self.commits[-1] if self.commits else None
+        return {
+            "databaseId": self.database_id,
+            "name": name,
+            "nameWithOwner": self.full_name,
+            "url": f"{base_url}/{self.full_name}",
+            "owner": {"login": owner},
+            "parent": self.parent and {"nameWithOwner": self.parent},
+            "defaultBranchRef": head
+            and {"name": self.default_branch, "target": {"oid": head, "history": {"totalCount": len(self.commits)}}},
+            "cruft": {"text": self.files[".cruft.json"]} if ".cruft.json" in self.files else None,
+        }
+
+
+_ids = iter(range(1000, 10**6))
+
+
+@dataclass
+class FakeGitHub:
+    """
+    A GitHub API server with the given repos, to be used as a context manager.
+
+    Use `base_url` as `Github(base_url=...)`.
+    With `git_root`, repos are served as `{base_url}/<owner>/<name>.git`
+    from the bare repositories `{git_root}/<owner>/<name>.git`, see `git_env`.
+    """
+
+    repos: dict[str, FakeRepo] = field(default_factory=dict)
+    login: str = "scverse-bot"
+    """The authenticated user, who owns new forks"""
+    fork_delay: int = 0
+    """Number of lookups of a new fork before it is found"""
+    git_root: Path | None = None
+    """Directory with bare repositories of the repos (`<owner>/<name>.git`)"""
+    requests: list[dict[str, Any]] = field(default_factory=list)
+    """The JSON bodies of the GraphQL requests received so far"""
+    server: ThreadingHTTPServer = field(init=False)
+    _new_forks: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add(self, repo: FakeRepo) -> FakeRepo:
+        self.repos[repo.full_name] = repo
+        return repo
+
+    def git_env(self, *prefixes: str) -> dict[str, str]:
+        """
+        Environment variables that make git clone from and push to `git_root` instead of `base_url`.
+
+        URLs starting with one of `prefixes` (e.g. `https://github.com/`) are redirected as well.
+        """
+        assert self.git_root is not None
+        env = {"GIT_CONFIG_COUNT": str(1 + len(prefixes))}
+        for i, prefix in enumerate([f"{self.base_url}/", *prefixes]):
+            env[f"GIT_CONFIG_KEY_{i}"] = f"url.{self.git_root.as_uri()}/.insteadOf"
+            env[f"GIT_CONFIG_VALUE_{i}"] = prefix
+        return env
+
+    def __enter__(self) -> Self:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path, _, query = self.path.partition("?")
+                self.respond(*fake.get(path, parse_qs(query)))
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or "null")
+                self.respond(*fake.post(self.path, body))
+
+            def do_PATCH(self) -> None:
+                self.do_POST()
+
+            def respond(self, status: int, response: dict[str, Any] | list[Any]) -> None:
+                content = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *_args: object) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path: str, params: dict[str, list[str]] | None = None) -> tuple[int, dict[str, Any] | list[Any]]:
+        """Answer a REST API GET request with the query parameters `params`."""
+        if m := re.fullmatch(r"/users/([^/]+)", path):
+            return 200, {"login": m[1], "type": "User", "email": f"{m[1]}@users.noreply.github.com"}
+        if m := re.fullmatch(r"/repositories/(\d+)", path):
+            by_id = {repo.database_id: name for name, repo in self.repos.items()}
+            if (name := by_id.get(int(m[1]))) is not None:
+                return 200, self.rest_repo(name)
+        return self._get_repo_resource(path, params or {})
+
+    def _get_repo_resource(self, path: str, params: dict[str, list[str]]) -> tuple[int, dict[str, Any] | list[Any]]:
+        m = re.fullmatch(r"/repos/([^/]+/[^/]+)(?:/(releases/tags|commits|pulls)(?:/(.+))?)?", path)
+        if m and (repo := self.repos.get(m[1])):
+            match m[2]:
+                case None:
+                    return 200, self.rest_repo(m[1])
+                case "pulls" if m[3] is None:  # only filtering by head branch (`user:ref`) and `state=all`
+                    assert params.get("state") == ["all"]
+                    heads = params.get("head", [])
+                    return 200, [self.rest_pr(m[1], pr) for pr in repo.prs if f"{pr.author}:{pr.head_ref}" in heads]
+                case "releases/tags" if m[3] in repo.tags:
+                    html_url = f"{self.base_url}/{m[1]}/releases/{m[3]}"
+                    return 200, {"id": 1, "tag_name": m[3], "html_url": html_url, "body": f"Release {m[3]}"}
+                case "commits":
+                    return 200, {"sha": repo.tags.get(m[3], m[3])}
+                case "pulls" if pr := next((p for p in repo.prs if str(p.number) == m[3]), None):
+                    return 200, self.rest_pr(m[1], pr)
+        return 404, {"message": "Not Found"}
+
+    def post(self, path: str, body: Any) -> tuple[int, dict[str, Any]]:  # noqa: ANN401
+        """Answer a REST API POST or PATCH request, or a GraphQL query."""
+        if path == "/graphql":
+            self.requests.append(body)
+            return 200, self.graphql(body["variables"])
+        m = re.fullmatch(r"/repos/([^/]+/[^/]+)/(forks|pulls)(?:/(\d+))?", path)
+        if m and (repo := self.repos.get(m[1])):
+            if m[2] == "forks":
+                return 202, self.fork(m[1])
+            if m[3] is None:
+                pr = FakePR(len(repo.prs) + 1, body["head"].rpartition(":")[2], author=self.login)
+                repo.prs.append(pr)
+                return 201, self.rest_pr(m[1], pr)
+            if pr := next((p for p in repo.prs if str(p.number) == m[3]), None):
+                pr.state = body.get("state", pr.state).upper()
+                return 200, self.rest_pr(m[1], pr)
+        return 404, {"message": "Not Found"}
+
+    def fork(self, full_name: str) -> dict[str, Any]:
+        """Create a fork, which becomes visible after `fork_delay` lookups."""
+        repo = self.repos[full_name]
+        fork_name = f"{self.login}/{full_name.split('/')[1]}"
+        if fork_name not in self.repos:
+            if self.git_root is not None:
+                src, dst = (self.git_root / f"{name}.git" for name in (full_name, fork_name))
+                Repo.clone_from(src, dst, bare=True).close()
+            self.add(FakeRepo(fork_name, list(repo.commits), dict(repo.files), parent=full_name))
+            self._new_forks[fork_name] = self.fork_delay
+        return self.rest_repo(fork_name)
+
+    def rest_repo(self, full_name: str) -> dict[str, Any]:
+        """The REST API representation of a repository."""
+        repo = self.repos[full_name]
+        node = repo.node(self.base_url)
+        return {
+            "id": node["databaseId"],
+            "name": node["name"],
+            "full_name": full_name,
+            "owner": {"login": node["owner"]["login"]},
+            "url": f"{self.base_url}/repos/{full_name}",
+            "html_url": node["url"],
+            "clone_url": f"{node['url']}.git",
+            "default_branch": repo.default_branch if repo.commits else None,
+        }
+
+    def rest_pr(self, full_name: str, pr: FakePR) -> dict[str, Any]:
+        """The REST API representation of a pull request."""
+        return {
+            "number": pr.number,
+            "state": "open" if pr.state == "OPEN" else "closed",
+            "url": f"{self.base_url}/repos/{full_name}/pulls/{pr.number}",
+            "html_url": f"{self.base_url}/{full_name}/pull/{pr.number}",
+            "head": {"ref": pr.head_ref, "label": f"{pr.author}:{pr.head_ref}"},
+            "merged_at": "2024-01-01T00:00:00Z" if pr.state == "MERGED" else None,
+        }
+
+    def graphql(self, variables: dict[str, Any]) -> dict[str, Any]:
+        data: dict[str, Any] = {}
+        errors = []
+        if "q" in variables:  # `prs.SEARCH_QUERY`
+            data["search"] = {"nodes": self._search(variables["q"])}
+        for i in _indices(variables):
+            full_name = f"{variables[f'owner{i}']}/{variables[f'name{i}']}"
+            repo = self.repos.get(full_name)
+            if self._new_forks.get(full_name, 0) > 0:
+                self._new_forks[full_name] -= 1
+                repo = None
+            if f"cursor{i}" in variables:  # root commit query
+                head, offset = variables[f"cursor{i}"].split()
+                assert repo is not None
+                assert head == repo.commits[-1]
+                root = repo.commits[::-1][int(offset) + 1]
+                data[f"c{i}"] = {"defaultBranchRef": {"target": {"history": {"nodes": [{"oid": root}]}}}}
+                continue
+            if "login" not in variables:  # plain lookup
+                data[f"r{i}"] = repo and repo.node(self.base_url)
+                errors += [] if repo else [{"type": "NOT_FOUND", "path": [f"r{i}"]}]
+                continue
+            fork = self.repos.get(f"{variables['login']}/{variables[f'name{i}']}")
+            data[f"r{i}"] = repo and repo.node(self.base_url)
+            data[f"f{i}"] = fork and fork.node(self.base_url)
+            data[f"s{i}"] = {"nodes": self._search(variables[f"search{i}"])}
+            errors += [{"type": "NOT_FOUND", "path": [k]} for k in (f"r{i}", f"f{i}") if data[k] is None]
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+    def _search(self, query: str) -> list[dict[str, Any]]:
+        qualifiers = dict(q.split(":", 1) for q in query.split())
+        repo = self.repos.get(qualifiers["repo"])
+        return [
+            {
+                "number": pr.number,
+                "state": pr.state,
+                "headRefName": pr.head_ref,
+                "author": pr.author and {"login": pr.author},
+            }
+            for pr in (repo.prs if repo else [])
+            if pr.indexed and pr.author == qualifiers["author"] and pr.head_ref.startswith(qualifiers["head"])
+        ]
+
+
+def _indices(variables: dict[str, Any]) -> Generator[int]:
+    return (int(k.removeprefix("owner")) for k in variables if re.fullmatch(r"owner\d+", k))
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Protocol
+
+import pytest
+from cookiecutter.main import cookiecutter
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from typing import Any
+
+
+TEMPLATE = Path(__file__).parents[2]
+
+
+class RenderProject(Protocol):
+    def __call__(self, extra_context: Mapping[str, Any] = ..., /) -> Path: ...
+
+
+@pytest.fixture(scope="session")
+def render_project(tmp_path_factory: pytest.TempPathFactory) -> RenderProject:
+    """
+    Render the template with cookiecutter, once per distinct context and test session.
+
+    Returns the project directory, which is shared between tests and must not be modified.
+    With pytest-xdist, the workers share the renderings as well: the first worker to need a context renders it,
+    the others wait for it to finish.
+    """
+    base = tmp_path_factory.getbasetemp()
+    if "PYTEST_XDIST_WORKER" in os.environ:
+        # the base directories of all workers of a session are next to each other
+        base = base.parent
+    root = base / "renderings"
+    root.mkdir(exist_ok=True)
+
+    def render(extra_context: Mapping[str, Any] = MappingProxyType({}), /) -> Path:
+        key = hashlib.sha256(json.dumps(extra_context, sort_keys=True).encode()).hexdigest()[:16]
+        output_dir = root / key
+        with (root / f"{key}.lock").open("w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # released when the file is closed
+            if not output_dir.is_dir():
+                # a rendering that failed half-way must not be reused
+                tmp_dir = root / f"{key}.tmp"
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                cookiecutter(str(TEMPLATE), output_dir=tmp_dir, no_input=True, extra_context=dict(extra_context))
+                tmp_dir.rename(output_dir)
+        [project_dir] = output_dir.iterdir()
+        return project_dir
+
+    return render
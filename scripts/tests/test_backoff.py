@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from github import GithubException
+
+from scverse_template_scripts.backoff import (
+    DecorrelatedJitter,
+    Exponential,
+    RetryPolicy,
+    on_exceptions,
+    on_status,
+    retry_stats,
+)
+
+N_FAILURES = 3
+
+
+class Flaky:
+    def __init__(self, n_failures: int, exc: Exception) -> None:
+        self.n_failures = n_failures
+        self.exc = exc
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.calls <= self.n_failures:
+            raise self.exc
+        return "ok"
+
+    async def acall(self) -> str:
+        return self()
+
+
+def test_retry() -> None:
+    fn = Flaky(N_FAILURES, KeyError())
+    policy = RetryPolicy("test retry", on_exceptions(KeyError), Exponential(base=0.001, jitter=0))
+    assert policy(fn) == "ok"
+    assert fn.calls == N_FAILURES + 1
+    stats = retry_stats()["test retry"]
+    assert (stats.calls, stats.attempts) == (1, N_FAILURES + 1)
+    assert stats.slept == pytest.approx(0.001 + 0.002 + 0.004)
+
+
+def test_retry_async() -> None:
+    fn = Flaky(N_FAILURES, KeyError())
+    policy = RetryPolicy("test retry async", on_exceptions(KeyError), DecorrelatedJitter(base=0.001, cap=0.01))
+    assert asyncio.run(policy.acall(fn.acall)) == "ok"
+    assert fn.calls == N_FAILURES + 1
+
+
+@pytest.mark.parametrize(
+    ("policy", "exc", "expected_calls"),
+    [
+        pytest.param(RetryPolicy("other", on_exceptions(KeyError)), ValueError(), 1, id="other_exception"),
+        pytest.param(
+            RetryPolicy("attempts", on_exceptions(KeyError), Exponential(0, jitter=0), max_attempts=2),
+            KeyError(),
+            2,
+            id="max_attempts",
+        ),
+        pytest.param(
+            RetryPolicy("status", on_status(502), Exponential(0, jitter=0)),
+            GithubException(404),
+            1,
+            id="other_status",
+        ),
+    ],
+)
+def test_give_up(policy: RetryPolicy, exc: Exception, expected_calls: int) -> None:
+    fn = Flaky(10, exc)
+    with pytest.raises(type(exc)):
+        policy(fn)
+    assert fn.calls == expected_calls
+
+
+def test_deadline() -> None:
+    fn = Flaky(10, KeyError())
+    policy = RetryPolicy("deadline", on_exceptions(KeyError), Exponential(base=10), max_attempts=None, deadline=0.05)
+    start = time.monotonic()
+    with pytest.raises(KeyError):
+        policy(fn)
+    # the long sleep was cut short, so there is one last attempt at the deadline
+    assert time.monotonic() - start < 1
+    assert fn.calls == 2  # noqa: PLR2004
+
+
+def test_retry_after() -> None:
+    fn = Flaky(1, GithubException(403, headers={"Retry-After": "0.05"}))
+    policy = RetryPolicy("retry after", on_status(403), Exponential(base=10))
+    start = time.monotonic()
+    assert policy(fn) == "ok"
+    assert 0.05 <= time.monotonic() - start < 1  # noqa: PLR2004
@@ -13,6 +13,8 @@ if TYPE_CHECKING:
     from collections.abc import Mapping
     from typing import Any
 
+    from .conftest import RenderProject
+
 
 HERE = Path(__file__).parent
 
@@ -45,10 +47,11 @@ HERE = Path(__file__).parent
         ),
     ],
 )
-def test_build(tmp_path: Path, params: Mapping[str, Any], path: Path | str, pattern: re.Pattern | str | None) -> None:
-    cookiecutter(str(HERE.parent.parent), output_dir=tmp_path, no_input=True, extra_context=params)
-    proj_dir = tmp_path / "project-name"
-    assert proj_dir.is_dir()
+def test_build(
+    render_project: RenderProject, params: Mapping[str, Any], path: Path | str, pattern: re.Pattern | str | None
+) -> None:
+    proj_dir = render_project(params)
+    assert proj_dir.name == "project-name"
     path = proj_dir / path
     if pattern is None:
         assert not path.exists()
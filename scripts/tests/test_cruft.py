@@ -1,28 +1,47 @@
 from __future__ import annotations
 
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from threading import Thread
+from types import SimpleNamespace
 from typing import TYPE_CHECKING
 
 import pytest
+import requests
 from git.repo.base import Repo
+from git.util import Actor
+from github import Github
 from github.Repository import Repository
 
+from scverse_template_scripts import _transport
 from scverse_template_scripts.cruft_prs import (
     GitHubConnection,
+    TemplateSync,
     _apply_update,
     _clone_and_prepare_repo,
+    _commit_rendered,
     _commit_update,
     _escape_github_mentions,
     _get_cruft_config_from_upstream,
+    _parse_stage_jobs,
+    _write_preview,
+    _write_preview_report,
+    download_template,
     get_repo_urls,
     get_template_release,
 )
+from scverse_template_scripts.preflight import RepoSnapshot
+from scverse_template_scripts.prs import PRCache, PRInfo
+from scverse_template_scripts.sync import sync_tree
+from testing.scverse_template_scripts.github import FakeGitHub, FakePR, FakeRepo
 
 if TYPE_CHECKING:
     from collections.abc import Generator
 
-    from git import Repo
     from github.Repository import Repository
 
 
@@ -145,6 +164,52 @@ def test_commit_update_no_files(clone: Repo) -> None:
     assert _commit_update(clone, commit_msg="foo", commit_author="scverse-bot") is False
 
 
+def test_commit_rendered(tmp_path: Path) -> None:
+    """Committing with plumbing commands results in the same tree as committing from the working tree"""
+    repo_dir, rendered = tmp_path / "repo", tmp_path / "rendered"
+    repo = Repo.init(repo_dir)
+    for path, content in {
+        "same.txt": "same",
+        "excluded.txt": "old",
+        "removed.txt": "removed",
+        ".github/workflows/custom.yml": "kept",
+    }.items():
+        (repo_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        (repo_dir / path).write_text(content)
+    repo.git.add(A=True)
+    repo.git.commit(m="initial", no_gpg_sign=True)
+    repo.create_head("plumbing")
+    for path, content in {
+        "same.txt": "same",
+        "excluded.txt": "new",
+        "added/excluded.txt": "new",
+        "added/script.sh": "#!/bin/sh",
+        ".cruft.json": "rendered",
+    }.items():
+        (rendered / path).parent.mkdir(parents=True, exist_ok=True)
+        (rendered / path).write_text(content)
+    (rendered / "added/script.sh").chmod(0o755)
+    exclude = ["excluded.txt", "added/excl*"]
+
+    def commit_rendered() -> bool:
+        author = Actor("scverse-bot", "bot@example.com")
+        files = {".cruft.json": "patched"}
+        return _commit_rendered(
+            repo, rendered, branch="plumbing", files=files, exclude_files=exclude, commit_msg="update", author=author
+        )
+
+    assert commit_rendered() is True
+    sync_tree(rendered, repo_dir)
+    (repo_dir / ".cruft.json").write_text("patched")
+    assert _commit_update(
+        repo, exclude_files=exclude, commit_msg="update", commit_author="scverse-bot <bot@example.com>"
+    )
+
+    assert repo.commit("plumbing").tree.hexsha == repo.head.commit.tree.hexsha
+    assert repo.commit("plumbing").author.email == "bot@example.com"
+    assert commit_rendered() is False
+
+
 @pytest.mark.parametrize(
     ("input_text", "expected"),
     [
@@ -200,3 +265,209 @@ def test_escape_github_mentions_inside_code_span() -> None:
     in GitHub's auto-generated release notes. See ``_escape_github_mentions``.
     """
     assert _escape_github_mentions("`see @bar here`") == "`see @bar here`"
+
+
+def test_github_connection_thread_safe() -> None:
+    """Concurrent API calls must each receive their own response (see `_transport`)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            login = self.path.rsplit("/", 1)[-1]
+            time.sleep(0.01)  # make sure requests overlap
+            body = json.dumps({"login": login, "id": hash(login), "url": self.path}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_: object) -> None:
+            pass
+
+    with ThreadingHTTPServer(("127.0.0.1", 0), Handler) as server:
+        Thread(target=server.serve_forever, daemon=True).start()
+        gh = Github(base_url=f"http://127.0.0.1:{server.server_port}")
+        _transport.Transport().install(gh)
+        logins = [f"user{i}" for i in range(32)]
+        with ThreadPoolExecutor(8) as pool:
+            users = list(pool.map(gh.get_user, logins))
+        server.shutdown()
+    assert [u.login for u in users] == logins
+
+
+def test_github_connection_shared_session(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Connections to the same host share one session instead of creating one per request"""
+    sessions: list[requests.Session] = []
+
+    class Session(requests.Session):
+        def __init__(self) -> None:
+            super().__init__()
+            sessions.append(self)
+
+    monkeypatch.setattr(requests, "Session", Session)
+    transport = _transport.Transport()
+    connections = [transport.https("shared-session.example.com", timeout=15) for _ in range(3)]
+    assert len(sessions) == 1
+    assert all(c.session is sessions[0] for c in connections)
+    assert transport.https("other.example.com").session is not sessions[0]
+    # other clients have their own sessions and limiter
+    other = _transport.Transport()
+    assert other.https("shared-session.example.com", timeout=15).session is not sessions[0]
+    assert other.limiter is not transport.limiter
+
+
+def test_download_template(tmp_path: Path) -> None:
+    """Only the tag is fetched, and the patched checkout is reused from the cache"""
+    src = Repo.init(tmp_path / "src")
+    for i, choices in enumerate([["a"], ["a", "b"]]):
+        (tmp_path / "src/cookiecutter.json").write_text(json.dumps({"choice": choices, "_copy_without_render": []}))
+        src.git.add(A=True)
+        src.git.commit(m=f"commit {i}", no_gpg_sign=True)
+    src.create_tag("v1")
+    commit = src.head.commit.hexsha
+    con = SimpleNamespace(auth=lambda url: url)
+    cache_dir = tmp_path / "cache"
+
+    def download() -> str:
+        with download_template(con, str(tmp_path / "src"), "v1", commit=commit, cache_dir=cache_dir) as td:  # type: ignore[arg-type]
+            checkout = Repo(td)
+            assert checkout.head.commit.parents[0].hexsha == commit
+            assert checkout.git.rev_list("--count", "HEAD") == "2"  # the tag and the patch commit
+            assert json.loads(Path(td, "cookiecutter.json").read_text()) == {"choice": "", "_copy_without_render": []}
+            return td
+
+    first = download()
+    src.git.tag("-d", "v1")  # a cache hit doesn’t fetch
+    assert download() == first
+    assert [p.name for p in cache_dir.iterdir()] == [f"v1-{commit}"]
+
+
+def test_preview(tmp_path: Path) -> None:
+    """The update commit of a repo is written as diffstat and patch, and summarized in the report"""
+    repo = Repo.init(tmp_path / "repo")
+    for i, content in enumerate(["old\n", "new\n"]):
+        (tmp_path / "repo/a.txt").write_text(content)
+        repo.git.add(A=True)
+        repo.git.commit(m=f"commit {i}", no_gpg_sign=True)
+    preview_dir = tmp_path / "preview"
+    preview_dir.mkdir()
+
+    stat = _write_preview(repo, repo.active_branch.name, preview_dir, "scverse-a")
+    assert stat == "1 file changed, 1 insertion(+), 1 deletion(-)"
+    assert "a.txt | 2 +-" in (preview_dir / "scverse-a.diffstat").read_text()
+    assert "+new" in (preview_dir / "scverse-a.patch").read_text()
+
+    results = {"https://github.com/scverse/a": f"preview: {stat}", "https://github.com/scverse/b": None}
+    _write_preview_report(preview_dir / "report.md", "v0.5.0", results)
+    report = (preview_dir / "report.md").read_text()
+    assert report.startswith("# Template update preview for v0.5.0\n")
+    assert "| https://github.com/scverse/b | failed |" in report
+    assert "## scverse-a" in report
+
+
+def test_parse_stage_jobs() -> None:
+    workers = _parse_stage_jobs(["fork=16", "render=2"], 4)
+    assert workers == {"check": 4, "fork": 16, "clone": 4, "render": 2, "commit": 4, "push": 4, "pr": 4}
+
+
+@pytest.mark.parametrize("spec", ["fork", "fork=0", "fork=x", "frok=2"])
+def test_parse_stage_jobs_invalid(spec: str) -> None:
+    with pytest.raises(ValueError, match=r"Invalid stage limit"):
+        _parse_stage_jobs([spec], 1)
+
+
+@pytest.mark.parametrize(
+    ("cruft_config", "prs", "expected"),
+    [
+        pytest.param({"commit": "new", "checkout": "v0.5.0"}, [], "skipped: already at v0.5.0", id="current"),
+        pytest.param({"commit": "new", "checkout": None}, [], "skipped: already at v0.5.0", id="current-commit"),
+        pytest.param({"commit": "old", "checkout": "v0.4.0"}, [], None, id="outdated"),
+        pytest.param({"commit": "old"}, [("v0.4.0", "open")], None, id="outdated-old-pr"),
+        pytest.param({"commit": "old"}, [("v0.5.0", "closed")], "skipped: PR #1 already exists", id="closed-pr"),
+    ],
+)
+def test_check(
+    tmp_path: Path, cruft_config: dict[str, str | None], prs: list[tuple[str, str]], expected: str | None
+) -> None:
+    """Repos that are up to date or have a PR for the current release are skipped before cloning"""
+    con = SimpleNamespace(login="scverse-bot")
+    release = SimpleNamespace(commit="new", tag_name="v0.5.0")
+    snapshot = RepoSnapshot(
+        repo=SimpleNamespace(full_name="scverse/a"),  # type: ignore[arg-type]
+        fork=None,
+        cruft_json=json.dumps({**cruft_config, "context": {"cookiecutter": {}}}),
+        root_commit=None,
+        prs=[
+            PRInfo(number=i, head_ref=f"template-update-v2-scverse-a-{tag}", state=state, author="scverse-bot")  # type: ignore[typeddict-item]
+            for i, (tag, state) in enumerate(prs, 1)
+        ],
+    )
+    sync = TemplateSync(
+        con,  # type: ignore[arg-type]
+        release,  # type: ignore[arg-type]
+        template_dir="",
+        log_dir=tmp_path,
+        snapshots={"scverse/a": snapshot},
+    )
+    job = sync.job("https://github.com/scverse/a")
+
+    assert sync.check(job) is (expected is None)
+    assert job.result == expected
+    assert job.skipped is (expected is not None)
+
+
+def test_check_pr_cache(tmp_path: Path) -> None:
+    """With a snapshot, PRs from earlier runs that the search doesn’t find yet are known from the cache"""
+    con = SimpleNamespace(login="scverse-bot")
+    release = SimpleNamespace(commit="new", tag_name="v0.5.0")
+    snapshot = RepoSnapshot(
+        repo=SimpleNamespace(full_name="scverse/a"),  # type: ignore[arg-type]
+        fork=None,
+        cruft_json=json.dumps({"commit": "old", "context": {"cookiecutter": {}}}),
+        root_commit=None,
+        prs=[],
+    )
+    pr_cache = PRCache(tmp_path / "prs")
+    pr = PRInfo(number=3, head_ref="template-update-v2-scverse-a-v0.5.0", state="open", author="scverse-bot")
+    pr_cache.save("scverse-a", [pr])
+    sync = TemplateSync(
+        con,  # type: ignore[arg-type]
+        release,  # type: ignore[arg-type]
+        template_dir="",
+        log_dir=tmp_path,
+        pr_cache=pr_cache,
+        snapshots={"scverse/a": snapshot},
+    )
+    job = sync.job("https://github.com/scverse/a")
+
+    assert sync.check(job) is False
+    assert job.result == "skipped: PR #3 already exists"
+
+
+@pytest.mark.parametrize(
+    ("current_pr", "expected", "old_state"),
+    [
+        pytest.param(True, "PR #2 already exists", "OPEN", id="not-indexed"),
+        pytest.param(False, "created PR #2", "CLOSED", id="new"),
+    ],
+)
+def test_pr(tmp_path: Path, *, current_pr: bool, expected: str, old_state: str) -> None:
+    """A PR for the current version that the search doesn’t find yet is neither duplicated nor does it close others"""
+    prefix = "template-update-v2-scverse-a"
+    with FakeGitHub() as server:
+        repo = server.add(FakeRepo("scverse/a", prs=[FakePR(1, f"{prefix}-v0.4.0")]))
+        if current_pr:
+            repo.prs.append(FakePR(2, f"{prefix}-v0.5.0", indexed=False))
+        con = GitHubConnection("scverse-bot", base_url=server.base_url)
+        release = SimpleNamespace(commit="new", tag_name="v0.5.0", html_url="", body="")
+        sync = TemplateSync(con, release, template_dir="", log_dir=tmp_path)  # type: ignore[arg-type]
+        job = sync.job("https://github.com/scverse/a")
+        job.original_repo = con.gh.get_repo("scverse/a")
+        job.existing_prs = job.pr.find_existing(job.original_repo)
+        assert [p["number"] for p in job.existing_prs] == [1]
+
+        assert sync.pr(job) is False
+
+    assert job.result == expected
+    assert repo.prs[0].state == old_state
+    assert [p.number for p in repo.prs] == [1, 2]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+from github import Github
+
+from scverse_template_scripts.forks import ForkPoller
+from testing.scverse_template_scripts.github import FakeGitHub, FakeRepo
+
+N_REPOS = 3
+FORK_DELAY = 2
+
+
+def test_fork_poller() -> None:
+    with FakeGitHub(fork_delay=FORK_DELAY) as server:
+        names = [server.add(FakeRepo(f"scverse/r{i}")).full_name for i in range(N_REPOS)]
+        gh = Github(base_url=server.base_url, seconds_between_requests=None, seconds_between_writes=None)
+        with ForkPoller(gh, interval=0.01) as poller:
+            futures = [poller.request(gh.get_repo(name)) for name in names]
+            forks = [f.result(timeout=10) for f in futures]
+
+    assert [fork.full_name for fork in forks] == [f"scverse-bot/r{i}" for i in range(N_REPOS)]
+    # all pending forks are checked in the same query
+    assert len(server.requests) <= FORK_DELAY + N_REPOS
+
+
+def test_fork_poller_timeout() -> None:
+    with FakeGitHub(fork_delay=1000) as server:
+        server.add(FakeRepo("scverse/a"))
+        gh = Github(base_url=server.base_url, seconds_between_requests=None, seconds_between_writes=None)
+        with ForkPoller(gh, interval=0.01, timeout=0.05) as poller:
+            future = poller.request(gh.get_repo("scverse/a"))
+            with pytest.raises(TimeoutError):
+                future.result(timeout=10)
+
+
+def test_fork_poller_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    """If the poller fails, the pending and later requests fail instead of waiting forever"""
+
+    def poll(_self: ForkPoller, _pending: list[object]) -> list[object]:
+        msg = "defaultBranchRef"
+        raise KeyError(msg)
+
+    monkeypatch.setattr(ForkPoller, "_poll", poll)
+    with FakeGitHub(fork_delay=1000) as server:
+        server.add(FakeRepo("scverse/a"))
+        server.add(FakeRepo("scverse/b"))
+        gh = Github(base_url=server.base_url, seconds_between_requests=None, seconds_between_writes=None)
+        with ForkPoller(gh, interval=0.01) as poller:
+            future = poller.request(gh.get_repo("scverse/a"))
+            with pytest.raises(KeyError):
+                future.result(timeout=10)
+            with pytest.raises(KeyError):
+                poller.request(gh.get_repo("scverse/b")).result(timeout=10)
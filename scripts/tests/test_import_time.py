@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = frozenset({"github", "git", "furl", "yaml", "cyclopts", "cookiecutter", "jinja2", "rich"})
+CLI_MODULES = frozenset({"cyclopts", "rich"})
+"""Needed to parse the arguments and print the help"""
+BARE_CLI = "import cyclopts; cyclopts.App(default_command=lambda: None)()"
+"""A CLI that does nothing, the baseline for the startup time of ours"""
+CLI_BUDGET = 2
+"""How many times as long as :data:`BARE_CLI` our CLIs may take to start"""
+RUNS = 5
+"""Ratios are the best of several runs, as other tests (e.g. with pytest-xdist) can slow down single runs"""
+
+
+def import_times(*args: str) -> tuple[float, set[str]]:
+    """
+    Run Python with `args` in a fresh interpreter.
+
+    Returns
+    -------
+    total_time
+        total time in seconds spent on imports
+    modules
+        the top level packages of all imported modules
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], capture_output=True, text=True, check=True, encoding="utf-8"
+    )
+    total_time = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not name.startswith("  "):  # nested imports are indented, their time is included in the outer one’s
+            total_time += int(cumulative) / 1e6
+        modules.add(name.strip().split(".")[0])
+    return total_time, modules
+
+
+def best_ratio(args: tuple[str, ...], baseline: tuple[str, ...]) -> tuple[float, set[str]]:
+    """
+    Compare the import time of running Python with `args` to that of `baseline`.
+
+    Both are run alternately, so other tests running at the same time slow both down alike.
+
+    Returns
+    -------
+    ratio
+        the lowest ratio of import times over :data:`RUNS` pairs of runs
+    modules
+        the top level packages of all modules imported with `args`
+    """
+    ratios = []
+    for _ in range(RUNS):
+        total_time, modules = import_times(*args)
+        ratios.append(total_time / import_times(*baseline)[0])
+    return min(ratios), modules
+
+
+@pytest.mark.parametrize(
+    ("module", "budget"),
+    [
+        pytest.param("scverse_template_scripts.cruft_prs", 40, id="cruft_prs"),
+        pytest.param("scverse_template_scripts.make_rich_output", 8, id="make_rich_output"),
+    ],
+)
+def test_import_time(module: str, budget: float) -> None:
+    """Helper processes start fast: heavy dependencies are only imported where they are used
+
+    `budget` is relative to the import time of a bare interpreter.
+    """
+    ratio, modules = best_ratio(("-c", f"import {module}"), ("-c", "pass"))
+    assert not modules & HEAVY_MODULES
+    assert ratio < budget
+
+
+@pytest.mark.parametrize("entry_point", ["cli", "merge_cli"])
+def test_cli_startup(entry_point: str) -> None:
+    """The CLIs print their help without importing any dependencies needed only for the actual work"""
+    code = f"from scverse_template_scripts.cruft_prs import {entry_point}; {entry_point}()"
+    ratio, modules = best_ratio(("-c", code, "--help"), ("-c", BARE_CLI, "--help"))
+    assert not modules & (HEAVY_MODULES - CLI_MODULES)
+    assert ratio < CLI_BUDGET
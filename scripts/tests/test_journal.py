@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+from scverse_template_scripts.cruft_prs import TemplateSync
+from scverse_template_scripts.journal import Journal
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+A = "https://github.com/scverse/a"
+B = "https://github.com/scverse/b"
+
+
+def test_journal(tmp_path: Path) -> None:
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(path, "v0.5.0")
+    journal.record(A, "fork", fork="scverse-bot/a")
+    journal.record(A, "push", updated=True)
+    journal.record(A, "pr", result="created PR #3")
+    journal.record(B, "fork", fork="scverse-bot/b")
+    Journal(path, "v0.4.0", resume=True).record(B, "push", updated=False)
+    with path.open("a") as f:
+        f.write('{"tag": "v0.5.0", "repo": ')  # killed while writing
+
+    resumed = Journal(path, "v0.5.0", resume=True)
+    assert resumed.finished() == {A: "created PR #3"}
+    assert resumed.completed(B) == {"fork": {"fork": "scverse-bot/b"}}
+    assert resumed.completed("https://github.com/scverse/c") == {}
+    # entries recorded after the incomplete one survive the next resume
+    resumed.record(B, "pr", result="created PR #4")
+    assert Journal(path, "v0.5.0", resume=True).finished() == {A: "created PR #3", B: "created PR #4"}
+
+    assert Journal(path, "v0.5.0").progress == {}
+    assert path.read_text() == ""
+
+
+def test_resume_steps(tmp_path: Path) -> None:
+    journal = Journal(tmp_path / "journal.jsonl", "v0.5.0")
+    journal.record(A, "fork", fork="scverse-bot/a")
+    journal.record(A, "push", updated=True)
+    con = SimpleNamespace(gh=SimpleNamespace(get_repo=lambda name: SimpleNamespace(full_name=name)))
+    release = SimpleNamespace(commit="new", tag_name="v0.5.0")
+    sync = TemplateSync(
+        con,  # type: ignore[arg-type]
+        release,  # type: ignore[arg-type]
+        template_dir="",
+        log_dir=tmp_path,
+        journal=Journal(tmp_path / "journal.jsonl", "v0.5.0", resume=True),
+    )
+    job = sync.job(A)
+
+    # these would fail without the journal, as the job has no original repo
+    for step in ["fork", "clone", "render", "commit", "push"]:
+        assert sync.run_step(step, job)
+    assert job.forked_repo.full_name == "scverse-bot/a"
+    assert job.updated
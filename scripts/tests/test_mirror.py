@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+from git.exc import GitCommandError
+from git.repo import Repo
+
+from scverse_template_scripts.mirror import MirrorCache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture
+def upstream(tmp_path: Path) -> Repo:
+    repo = Repo.init(tmp_path / "upstream", initial_branch="main")
+    (tmp_path / "upstream" / "README.md").write_text("hello\n")
+    repo.index.add(["README.md"])
+    repo.index.commit("initial commit")
+    return repo
+
+
+@pytest.fixture
+def fork(tmp_path: Path, upstream: Repo) -> Repo:
+    fork = upstream.clone(tmp_path / "fork.git", bare=True)
+    fork.git.config("uploadpack.allowFilter", "true")
+    return fork
+
+
+def test_worktree(tmp_path: Path, upstream: Repo, fork: Repo) -> None:
+    cache = MirrorCache(tmp_path / "cache", max_size=10**9)
+    urls = {"origin": f"file://{fork.git_dir}", "upstream": f"file://{upstream.working_dir}", "start": "upstream/main"}
+
+    with cache.worktree("repo", tmp_path / "wt", **urls) as wt:
+        assert {ref.name for ref in wt.refs} >= {"origin/main", "upstream/main"}
+        wt.git.checkout("upstream/main")
+        assert (tmp_path / "wt" / "README.md").read_text() == "hello\n"
+    assert not (tmp_path / "wt").exists()
+
+    # a second run only needs to fetch the new commit
+    (tmp_path / "upstream" / "README.md").write_text("hello again\n")
+    upstream.index.add(["README.md"])
+    new = upstream.index.commit("second commit")
+    (tmp_path / "wt").mkdir()
+    with cache.worktree("repo", tmp_path / "wt", **urls) as wt:
+        assert wt.commit("upstream/main") == new
+        wt.git.checkout("upstream/main")
+        assert (tmp_path / "wt" / "README.md").read_text() == "hello again\n"
+    assert (tmp_path / "wt").is_dir()
+
+
+def test_worktree_strips_credentials(tmp_path: Path, fork: Repo) -> None:
+    cache = MirrorCache(tmp_path / "cache", max_size=10**9)
+    origin = f"file://token@{fork.git_dir}"
+    # fetching fails, the URL has to be cleaned up nevertheless
+    with (
+        pytest.raises(GitCommandError),
+        cache.worktree("repo", tmp_path / "wt", origin=origin, upstream="", start="x"),
+    ):
+        pass
+    assert "token" not in Repo(tmp_path / "cache" / "repo.git").remote("origin").url
+
+
+def test_evict(tmp_path: Path) -> None:
+    cache = MirrorCache(tmp_path / "cache", max_size=150)
+    for i, name in enumerate(["old", "mid", "new"]):
+        repo_dir = tmp_path / "cache" / f"{name}.git"
+        repo_dir.mkdir()
+        (repo_dir / "objects").write_bytes(b"x" * 60)
+        os.utime(repo_dir, (i, i))
+    cache.evict()
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["mid.git", "new.git"]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from scverse_template_scripts.pipeline import Pipeline, Stage
+
+FAILING_JOB = 3
+
+
+def test_pipeline_order_and_outcomes() -> None:
+    seen: dict[str, list[int]] = {"first": [], "check": []}
+    errors: list[tuple[int, str]] = []
+    finished: list[int] = []
+
+    def first(job: int) -> bool:
+        seen["first"].append(job)
+        if job == FAILING_JOB:
+            msg = "boom"
+            raise RuntimeError(msg)
+        return job % 2 == 0  # odd jobs leave the pipeline early
+
+    def check(job: int) -> bool:
+        seen["check"].append(job)
+        return True
+
+    pipeline = Pipeline(
+        [Stage("first", first, 3), Stage("check", check, 2)],
+        on_error=lambda job, stage, _e: errors.append((job, stage.name)),
+        on_finish=finished.append,
+    )
+    pipeline.run(range(10))
+
+    assert sorted(seen["first"]) == list(range(10))
+    assert sorted(seen["check"]) == [0, 2, 4, 6, 8]
+    assert errors == [(FAILING_JOB, "first")]
+    assert sorted(finished) == list(range(10))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_pipeline_stage_limit(workers: int) -> None:
+    lock = threading.Lock()
+    active = peak = 0
+
+    def work(_job: int) -> bool:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return True
+
+    def fail(_job: object, _stage: object, e: Exception) -> None:
+        raise e
+
+    Pipeline([Stage("fast", lambda _: True, 4), Stage("limited", work, workers)], on_error=fail).run(range(12))
+    assert peak == workers
+
+
+def test_pipeline_failing_callbacks() -> None:
+    """Errors in `on_error` and `on_finish` are logged, and all jobs still leave the pipeline"""
+    finished: list[int] = []
+
+    def fail(job: int) -> bool:
+        if job == FAILING_JOB:
+            msg = "boom"
+            raise RuntimeError(msg)
+        return True
+
+    def on_error(_job: object, _stage: object, e: Exception) -> None:
+        raise e
+
+    def on_finish(job: int) -> None:
+        finished.append(job)
+        msg = "cleanup failed"
+        raise OSError(msg)
+
+    pipeline = Pipeline(
+        [Stage("fail", fail, 2), Stage("next", lambda _: True, 2)], on_error=on_error, on_finish=on_finish
+    )
+    pipeline.run(range(6))
+    assert sorted(finished) == list(range(6))
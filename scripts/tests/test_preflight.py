@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from github import Github, GithubException
+
+from scverse_template_scripts import preflight
+from scverse_template_scripts.preflight import snapshot_repos
+from testing.scverse_template_scripts.github import FakeGitHub, FakePR, FakeRepo
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    import pytest
+
+PREFIX = "template-update-v2-"
+N_QUERIES = 3
+
+
+def test_preflight() -> None:
+    with FakeGitHub() as server:
+        server.add(
+            FakeRepo(
+                "scverse/a",
+                commits=["a1", "a2", "a3"],
+                files={".cruft.json": json.dumps({"context": {}})},
+                prs=[FakePR(1, f"{PREFIX}scverse-a-v0.4.0", "MERGED"), FakePR(2, "other", "OPEN")],
+            )
+        )
+        server.add(FakeRepo("scverse-bot/a", commits=["a1", "a2"], parent="scverse/a"))
+        server.add(FakeRepo("scverse/b", commits=["b1"], default_branch="develop"))
+        server.add(FakeRepo("scverse-bot/b"))  # not a fork
+        server.add(FakeRepo("scverse/empty", commits=[]))
+
+        gh = Github(base_url=server.base_url)
+        repos = ["scverse/a", "scverse/b", "scverse/missing", "scverse/empty"]
+        snapshots = snapshot_repos(gh, repos, login="scverse-bot", head_prefix=PREFIX, batch_size=2)
+
+    assert snapshots.keys() == {"scverse/a", "scverse/b", "scverse/empty"}
+    # two batches, the first needs a second query for the root commit
+    assert len(server.requests) == N_QUERIES
+
+    a = snapshots["scverse/a"]
+    assert a.repo.full_name == "scverse/a"
+    assert a.repo.clone_url == f"{server.base_url}/scverse/a.git"
+    assert a.repo.default_branch == "main"
+    assert a.fork is not None
+    assert a.fork.full_name == "scverse-bot/a"
+    assert a.root_commit == "a1"
+    assert a.cruft_json == json.dumps({"context": {}})
+    assert [pr["number"] for pr in a.prs] == [1]
+
+    b = snapshots["scverse/b"]
+    assert b.repo.default_branch == "develop"
+    assert b.fork is None
+    assert (b.root_commit, b.cruft_json) == ("b1", None)
+
+    assert snapshots["scverse/empty"].root_commit is None
+
+
+def test_preflight_root_commit_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    """If the root commits can’t be determined, the rest of the snapshot is kept"""
+    graphql = preflight.graphql
+
+    def failing_graphql(gh: Github, fields: list[str], variables: dict[str, Any]) -> dict[str, Any]:
+        if "cursor0" in variables:
+            raise GithubException(502, {"message": "Bad Gateway"})
+        return graphql(gh, fields, variables)
+
+    monkeypatch.setattr(preflight, "graphql", failing_graphql)
+    with FakeGitHub() as server:
+        server.add(FakeRepo("scverse/a", commits=["a1", "a2"]))
+        gh = Github(base_url=server.base_url)
+        snapshots = snapshot_repos(gh, ["scverse/a"], login="scverse-bot", head_prefix=PREFIX)
+
+    assert snapshots["scverse/a"].repo.full_name == "scverse/a"
+    assert snapshots["scverse/a"].root_commit is None
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+from scverse_template_scripts.prs import PRCache, PRInfo, find_prs
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any
+
+
+def test_find_prs() -> None:
+    nodes = [
+        {"number": 1, "state": "MERGED", "headRefName": "template-update-v2-a-v0.4.0", "author": {"login": "bot"}},
+        {"number": 2, "state": "OPEN", "headRefName": "template-update-v2-a-v0.5.0", "author": {"login": "bot"}},
+        {"number": 3, "state": "OPEN", "headRefName": "fix-template-update-v2", "author": {"login": "bot"}},
+        {"number": 4, "state": "OPEN", "headRefName": "template-update-v2-a-v0.5.0", "author": {"login": "someone"}},
+        {"number": 5, "state": "OPEN", "headRefName": "template-update-v2-a", "author": None},  # deleted user
+        {},  # not a PR
+    ]
+    queries = []
+
+    def graphql_query(_query: str, variables: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+        queries.append(variables["q"])
+        return {}, {"data": {"search": {"nodes": nodes}}}
+
+    gh = SimpleNamespace(requester=SimpleNamespace(graphql_query=graphql_query))
+    prs = find_prs(gh, "scverse/a", author="bot", head_prefix="template-update-v2-")  # type: ignore[arg-type]
+
+    assert queries == ["repo:scverse/a is:pr author:bot head:template-update-v2-"]
+    assert [(p["number"], p["state"]) for p in prs] == [(1, "merged"), (2, "open")]
+
+
+def test_pr_cache(tmp_path: Path) -> None:
+    cache = PRCache(tmp_path / "prs")
+    assert cache.load("scverse-a") == []
+
+    prs = [PRInfo(number=1, head_ref="template-update-v2-a-v0.4.0", state="open", author="bot")]
+    cache.save("scverse-a", prs)
+    assert PRCache(tmp_path / "prs").load("scverse-a") == prs
+
+    (tmp_path / "prs" / "scverse-a.json").write_text("{")
+    assert cache.load("scverse-a") == []
+
+
+def test_pr_cache_update(tmp_path: Path) -> None:
+    """PRs that the search doesn’t find yet are kept, found ones are updated"""
+    cache = PRCache(tmp_path / "prs")
+    old = PRInfo(number=1, head_ref="template-update-v2-a-v0.4.0", state="open", author="bot")
+    new = PRInfo(number=2, head_ref="template-update-v2-a-v0.5.0", state="open", author="bot")
+    cache.save("scverse-a", [old, new])
+
+    closed = PRInfo(number=1, head_ref=old["head_ref"], state="closed", author="bot")
+    merged = cache.update("scverse-a", [closed])
+    assert [(p["number"], p["state"]) for p in merged] == [(1, "closed"), (2, "open")]
+    assert cache.load("scverse-a") == merged
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from scverse_template_scripts.ratelimit import RateLimiter
+
+INTERVAL = 0.05
+
+
+def _timed(limiter: RateLimiter, *requests: tuple[str, str]) -> float:
+    start = time.monotonic()
+    for verb, url in requests:
+        limiter.acquire(verb, url)
+    return time.monotonic() - start
+
+
+def test_writes_spaced() -> None:
+    limiter = RateLimiter(write_interval=INTERVAL)
+    # wall time has no upper bound under load, but requests that don’t need to wait aren’t throttled at all
+    _timed(limiter, *[("GET", "/repos/a/b")] * 5, ("POST", "/graphql"), ("POST", "/graphql"))
+    assert limiter.throttled == 0
+    elapsed = _timed(limiter, ("POST", "/repos/a/b/forks"), ("PATCH", "/repos/a/b"), ("POST", "/repos/a/b/pulls"))
+    assert elapsed >= 2 * INTERVAL
+    assert limiter.throttled >= 2 * INTERVAL * 0.9
+
+
+def test_writes_spaced_across_threads() -> None:
+    limiter = RateLimiter(write_interval=INTERVAL)
+    times: list[float] = []
+
+    def write() -> None:
+        limiter.acquire("POST", "/repos/a/b/pulls")
+        times.append(time.monotonic())
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # threads can wake up late under load, but never early, so compare to the start instead of to each other
+    times.sort()
+    assert all(t - start >= i * INTERVAL * 0.9 for i, t in enumerate(times))
+
+
+def test_token_bucket() -> None:
+    limiter = RateLimiter(rate=1 / INTERVAL, burst=2)
+    _timed(limiter, *[("GET", "/user")] * 2)
+    assert limiter.throttled == 0
+    assert _timed(limiter, *[("GET", "/user")] * 2) >= 2 * INTERVAL * 0.9
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        pytest.param({"retry-after": str(2 * INTERVAL)}, id="secondary"),
+        pytest.param(
+            {"x-ratelimit-remaining": "0", "x-ratelimit-reset": str(time.time() + 2 * INTERVAL)},
+            id="primary",
+        ),
+    ],
+)
+def test_back_off(headers: dict[str, str]) -> None:
+    limiter = RateLimiter()
+    limiter.update(headers)
+    assert _timed(limiter, ("GET", "/user")) >= INTERVAL
+
+
+def test_slow_down_when_low() -> None:
+    limiter = RateLimiter(burst=1, reserve=100)
+    # 10 requests left for the next 10 seconds, so one per second
+    limiter.update({"x-ratelimit-remaining": "10", "x-ratelimit-reset": str(time.time() + 10)})
+    limiter.acquire("GET", "/user")
+    start = time.monotonic()
+    limiter.acquire("GET", "/user")
+    assert time.monotonic() - start >= 10 * INTERVAL
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+from functools import partial
+from pathlib import Path
+
+from scverse_template_scripts.render import RenderCache, TemplateRenderer, render_template
+from scverse_template_scripts.trace import tracer
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent.parent
+
+
+def test_render_cache(tmp_path: Path) -> None:
+    cache = RenderCache(tmp_path / "cache", partial(render_template, template_dir=str(ROOT)))
+    logs = tmp_path / "logs"
+    logs.mkdir()
+
+    first = cache.get(cruft_log_file=logs / "a.log", extra_context={"project_name": "foo"})
+    assert (first / "pyproject.toml").is_file()
+    again = cache.get(cruft_log_file=logs / "b.log", extra_context={"project_name": "foo"})
+    assert again == first
+    assert "a.log" in (logs / "b.log").read_text()
+    other = cache.get(cruft_log_file=logs / "c.log", extra_context={"project_name": "foo", "license": "Unlicense"})
+    assert other != first
+
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def _tree(path: Path) -> dict[str, bytes]:
+    return {str(f.relative_to(path)): f.read_bytes() for f in path.rglob("*") if f.is_file() and ".git" not in f.parts}
+
+
+def test_template_renderer_matches_cruft(tmp_path: Path) -> None:
+    extra_context = {"project_name": "foo", "license": "Unlicense"}
+    (tmp_path / "cruft").mkdir()
+    (tmp_path / "in-process").mkdir()
+
+    expected = render_template(
+        tmp_path / "cruft", cruft_log_file=tmp_path / "cruft.log", extra_context=extra_context, template_dir=str(ROOT)
+    )
+    actual = TemplateRenderer(ROOT)(
+        tmp_path / "in-process", cruft_log_file=tmp_path / "in.log", extra_context=extra_context
+    )
+
+    assert actual.name == expected.name
+    expected_files, actual_files = _tree(expected), _tree(actual)
+    # cruft records the template as passed on the command line
+    expected_cruft, actual_cruft = (json.loads(files.pop(".cruft.json")) for files in (expected_files, actual_files))
+    assert actual_files.keys() == expected_files.keys()
+    assert actual_files == expected_files
+    assert actual_cruft["context"]["cookiecutter"].keys() == expected_cruft["context"]["cookiecutter"].keys()
+    assert actual_cruft["commit"] == expected_cruft["commit"]
+
+
+def test_sync_render(tmp_path: Path) -> None:
+    """With `_sync_render`, the hooks skip the git repo, but still prune the project"""
+    project_dir = TemplateRenderer(ROOT)(
+        tmp_path, cruft_log_file=tmp_path / "cruft.log", extra_context={"_sync_render": True}
+    )
+
+    assert not (project_dir / ".git").exists()
+    assert not (project_dir / "docs/template_usage.md").exists()
+    assert not list(project_dir.rglob("DELETE-ME"))
+    assert "Initialize project" not in (tmp_path / "cruft.log").read_text()
+
+
+def test_hook_timings(tmp_path: Path) -> None:
+    """The steps of both hooks are added to the trace"""
+    n_spans = len(tracer.spans)
+    TemplateRenderer(ROOT)(tmp_path, cruft_log_file=tmp_path / "cruft.log", extra_context={})
+
+    spans = tracer.spans[n_spans:]
+    assert any(s.name == "pre_gen_project" and s.category == "render" for s in spans)
+    steps = {(s.args["hook"], s.name) for s in spans if s.category == "hook"}
+    assert steps == {
+        ("pre_gen_project", "git init"),
+        ("pre_gen_project", "git config"),
+        ("post_gen_project", "remove devdocs"),
+        ("post_gen_project", "prune"),
+        ("post_gen_project", "git commit"),
+        ("post_gen_project", "install git hooks"),
+    }
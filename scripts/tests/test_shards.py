@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+
+from scverse_template_scripts.cruft_prs import merge_logs
+from scverse_template_scripts.shards import Shard
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_shards_partition() -> None:
+    repo_ids = [f"scverse-pkg{i}" for i in range(100)]
+    shards = [Shard(i, 3) for i in range(1, 4)]
+    assignment = [[repo_id in shard for shard in shards] for repo_id in repo_ids]
+    assert all(sum(in_shards) == 1 for in_shards in assignment)
+    assert all(any(in_shards[i] for in_shards in assignment) for i in range(3))
+
+
+@pytest.mark.parametrize("spec", ["1", "0/2", "3/2", "a/2", "1/"])
+def test_shard_parse_invalid(spec: str) -> None:
+    with pytest.raises(ValueError, match=r"Invalid shard"):
+        Shard.parse(spec)
+
+
+def test_merge_logs(tmp_path: Path) -> None:
+    """Results and journals are combined, and the exit code accounts for failed repos and unfinished shards"""
+    # the third shard didn’t start
+    shard_dirs = [tmp_path / f"shard-{i}" for i in range(1, 4)]
+    for i, shard_dir in enumerate(shard_dirs[:2], 1):
+        shard_dir.mkdir()
+        url = f"https://github.com/scverse/{i}"
+        (shard_dir / f"scverse-{i}.log").write_text("log")
+        (shard_dir / "journal.jsonl").write_text(json.dumps({"repo": url}) + "\n")
+        (shard_dir / "trace.json").write_text(json.dumps({"traceEvents": [{"name": "check", "ph": "X", "pid": 1}]}))
+        (shard_dir / "results.json").write_text(json.dumps({"tag_name": "v0.5.0", "results": {url: "created PR #1"}}))
+    output = tmp_path / "merged"
+
+    with pytest.raises(SystemExit) as exc_info:
+        merge_logs(shard_dirs, output=output)
+    assert exc_info.value.code is True
+
+    results = json.loads((output / "results.json").read_text())
+    assert results["results"] == {f"https://github.com/scverse/{i}": "created PR #1" for i in (1, 2)}
+    journal = [json.loads(line)["repo"] for line in (output / "journal.jsonl").read_text().splitlines()]
+    assert sorted(journal) == sorted(results["results"])
+    assert {e["pid"] for e in json.loads((output / "trace.json").read_text())["traceEvents"]} == {1, 2, 3}
+    assert (output / "scverse-2.log").is_file()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from scverse_template_scripts.sync import path_matcher, sync_tree
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_sync_tree(tmp_path: Path) -> None:
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    for path, content in {
+        "same.txt": "same",
+        "changed.txt": "new",
+        "added/file.txt": "added",
+        "replaced": "now a file",
+        ".github/workflows/test.yml": "rendered",
+        ".git/HEAD": "not copied",
+    }.items():
+        (src / path).parent.mkdir(parents=True, exist_ok=True)
+        (src / path).write_text(content)
+    for path, content in {
+        "same.txt": "same",
+        "changed.txt": "old",
+        "removed/file.txt": "removed",
+        "replaced/file.txt": "was a directory",
+        ".github/workflows/custom.yml": "kept",
+        ".git/HEAD": "kept",
+    }.items():
+        (dst / path).parent.mkdir(parents=True, exist_ok=True)
+        (dst / path).write_text(content)
+    same_stat = (dst / "same.txt").stat()
+
+    stats = sync_tree(src, dst)
+
+    assert (stats.added, stats.changed, stats.removed) == (3, 1, 2)
+    assert sorted(str(p.relative_to(dst)) for p in dst.rglob("*") if p.is_file()) == [
+        ".git/HEAD",
+        ".github/workflows/custom.yml",
+        ".github/workflows/test.yml",
+        "added/file.txt",
+        "changed.txt",
+        "replaced",
+        "same.txt",
+    ]
+    assert (dst / "changed.txt").read_text() == "new"
+    assert (dst / ".git/HEAD").read_text() == "kept"
+    assert (dst / "same.txt").stat().st_mtime_ns == same_stat.st_mtime_ns
+    assert sync_tree(src, dst).touched == 0
+
+
+@pytest.mark.parametrize(
+    ("patterns", "expected"),
+    [
+        ([], []),
+        (["doesntexist.txt"], []),
+        (["dir1/A.txt", "dir1/doesntexist.txt"], ["dir1/A.txt"]),
+        (["dir2/**.txt"], ["dir2/foo/A.txt", "dir2/D.txt"]),
+        (["dir2/*"], ["dir2/foo/A.txt", "dir2/D.txt"]),
+        (["dir2"], ["dir2/foo/A.txt", "dir2/D.txt"]),
+        (["*.md"], ["README.md", "docs/index.md"]),
+        (["docs/"], ["docs/index.md"]),
+    ],
+)
+def test_path_matcher(patterns: list[str], expected: list[str]) -> None:
+    paths = ["README.md", "dir1/A.txt", "dir2/foo/A.txt", "dir2/D.txt", "dir20/E.txt", "docs/index.md"]
+    matcher = path_matcher(patterns)
+    assert [p for p in paths if matcher(p)] == expected
+    assert path_matcher(iter(patterns)) is matcher
+
+
+def test_sync_tree_exclude(tmp_path: Path) -> None:
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    (src / "docs").mkdir(parents=True)
+    (src / "docs/index.md").write_text("rendered")
+    (src / "README.md").write_text("rendered")
+    (dst / "docs/api").mkdir(parents=True)
+    (dst / "docs/api/custom.md").write_text("kept")
+    (dst / "README.md").write_text("kept")
+
+    stats = sync_tree(src, dst, exclude=path_matcher(["docs", "README.md"]))
+
+    assert stats.touched == 0
+    assert sorted(str(p.relative_to(dst)) for p in dst.rglob("*") if p.is_file()) == ["README.md", "docs/api/custom.md"]
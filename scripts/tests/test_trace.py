@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import TYPE_CHECKING
+
+from rich.console import Console
+
+from scverse_template_scripts.trace import Tracer, _percentile
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_percentile() -> None:
+    values = [float(v) for v in range(1, 21)]
+    assert _percentile(values, 50) == 10  # noqa: PLR2004
+    assert _percentile(values, 95) == 19  # noqa: PLR2004
+    assert _percentile([3.0], 95) == 3  # noqa: PLR2004
+
+
+def test_tracer(tmp_path: Path) -> None:
+    tracer = Tracer()
+    with tracer.span("clone", repo="a"):
+        pass
+
+    def worker() -> None:
+        with tracer.span("GET", "github", url="/user"):
+            pass
+
+    thread = threading.Thread(target=worker, name="fork-0")
+    thread.start()
+    thread.join()
+
+    tracer.export(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert {e["args"]["name"] for e in events if e["ph"] == "M"} == {"MainThread", "fork-0"}
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert spans.keys() == {"clone", "GET"}
+    assert spans["GET"]["cat"] == "github"
+    assert spans["GET"]["args"] == {"url": "/user"}
+    assert spans["clone"]["dur"] >= 0
+
+    console = Console(width=200)
+    with console.capture() as capture:
+        console.print(tracer.summary())
+    assert "clone" in capture.get()